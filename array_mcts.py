@@ -0,0 +1,321 @@
+import numpy as np
+from game import Game
+from mcts import MCTS, SearchStats, terminal_value
+from typing import Callable
+
+class ArrayTree:
+    def __init__(self, capacity:int=4096) -> None:
+        """
+        以预分配的NumPy列数组保存整棵搜索树，节点以整数编号表示。
+        同一节点的所有子节点在数组中连续存放。
+
+        Args:
+            capacity (int, optional): 初始可容纳的节点数，不足时自动翻倍。默认为4096。
+
+        Returns:
+            None
+
+        """
+        self.parent = np.empty(capacity, dtype=np.int32)
+        self.first_child = np.empty(capacity, dtype=np.int32)
+        self.n_children = np.empty(capacity, dtype=np.uint16)
+        self.action = np.empty(capacity, dtype=np.int16)
+        self.N = np.empty(capacity, dtype=np.float32)
+        self.W = np.empty(capacity, dtype=np.float64)
+        self.P = np.empty(capacity, dtype=np.float32)
+        self.reset()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.parent)
+
+    @property
+    def nbytes_per_node(self) -> int:
+        """
+        每个节点占用的字节数。
+
+        Args:
+            无参数。
+
+        Returns:
+            int: 所有列数组单个元素字节数之和。
+
+        """
+        return sum(a.itemsize for a in (self.parent, self.first_child, self.n_children, self.action, self.N, self.W, self.P))
+
+    def reset(self) -> None:
+        """
+        清空整棵树，只保留一个根节点。
+
+        Args:
+            无参数。
+
+        Returns:
+            None
+
+        """
+        self.size = 0
+        self.root = self._alloc(1)
+        self._init_nodes(self.root, 1, -1)
+        self.action[self.root] = -1
+        self.P[self.root] = 1.0
+
+    def _alloc(self, n:int) -> int:
+        """
+        分配连续的n个节点编号，容量不足时将所有列数组扩容一倍。
+
+        Args:
+            n (int): 需要分配的节点数。
+
+        Returns:
+            int: 第一个节点的编号。
+
+        """
+        if self.size + n > self.capacity:
+            capacity = max(self.capacity * 2, self.size + n)
+            for name in ('parent', 'first_child', 'n_children', 'action', 'N', 'W', 'P'):
+                old = getattr(self, name)
+                new = np.empty(capacity, dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                setattr(self, name, new)
+        start = self.size
+        self.size += n
+        return start
+
+    def _init_nodes(self, start:int, n:int, parent:int) -> None:
+        end = start + n
+        self.parent[start:end] = parent
+        self.first_child[start:end] = -1
+        self.n_children[start:end] = 0
+        self.N[start:end] = 0.0
+        self.W[start:end] = 0.0
+
+    def is_leaf(self, node:int) -> bool:
+        return self.n_children[node] == 0
+
+    def children(self, node:int) -> range:
+        """
+        获取节点的全部子节点编号。
+
+        Args:
+            node (int): 节点编号。
+
+        Returns:
+            range: 子节点编号区间。
+
+        """
+        start = int(self.first_child[node])
+        return range(start, start + int(self.n_children[node]))
+
+    def expand(self, node:int, action_priors:list[tuple[int, float]]) -> None:
+        """
+        根据给定的先验动作概率，一次性为节点分配所有子节点。
+
+        Args:
+            node (int): 被扩展的节点编号。
+            action_priors (list[tuple[int, float]]): 包含动作和对应先验概率的元组列表。
+
+        Returns:
+            None
+
+        """
+        n = len(action_priors)
+        if n == 0 or self.n_children[node] > 0:
+            return
+        start = self._alloc(n)
+        self._init_nodes(start, n, node)
+        for i, (action, prob) in enumerate(action_priors):
+            self.action[start + i] = action
+            self.P[start + i] = prob
+        self.first_child[node] = start
+        self.n_children[node] = n
+
+    def select(self, node:int, c_puct:float) -> int:
+        """
+        用一次向量化的PUCT计算为节点的所有子节点打分，返回得分最高的子节点。
+
+        Args:
+            node (int): 当前节点编号。
+            c_puct (float): UCB公式中的参数，用于平衡探索和利用。
+
+        Returns:
+            int: 最优子节点编号。
+
+        """
+        start = self.first_child[node]
+        end = start + self.n_children[node]
+        n = self.N[start:end]
+        q = self.W[start:end] / np.maximum(n, 1.0)
+        u = c_puct * self.P[start:end] * np.sqrt(self.N[node]) / (1.0 + n)
+        return int(start + np.argmax(q + u))
+
+    def backup(self, node:int, value:float) -> None:
+        """
+        从节点沿父节点迭代回溯，更新访问次数与累计价值，每上升一层价值取反。
+
+        Args:
+            node (int): 起始节点编号。
+            value (float): 起始节点的价值。
+
+        Returns:
+            None
+
+        """
+        parent = self.parent
+        N = self.N
+        W = self.W
+        while node != -1:
+            N[node] += 1
+            W[node] += value
+            value = -value
+            node = parent[node]
+
+    def promote(self, child:int) -> None:
+        """
+        将子节点提升为新的根节点，把其子树按广度优先顺序压缩到数组前部并释放其余节点。
+
+        Args:
+            child (int): 新根节点的编号。
+
+        Returns:
+            None
+
+        """
+        order = [child]
+        i = 0
+        while i < len(order):
+            node = order[i]
+            order.extend(self.children(node))
+            i += 1
+        order = np.array(order, dtype=np.int32)
+        remap = np.full(self.size, -1, dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        for name in ('n_children', 'action', 'N', 'W', 'P'):
+            arr = getattr(self, name)
+            arr[:len(order)] = arr[order]
+        parent = self.parent[order]
+        first_child = self.first_child[order]
+        self.parent[:len(order)] = np.where(parent >= 0, remap[np.maximum(parent, 0)], -1)
+        self.parent[0] = -1
+        self.first_child[:len(order)] = np.where(first_child >= 0, remap[np.maximum(first_child, 0)], -1)
+        self.size = len(order)
+        self.root = 0
+
+
+class ArrayMCTS(MCTS):
+    def __init__(self, policy_value_fn:Callable[[Game], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000, undo:bool=False, capacity:int=4096,
+                 time_limit:float|None=None, max_nodes:int|None=None, early_stop:bool=False,
+                 profile:bool=False, hook:Callable[[SearchStats], None]|None=None) -> None:
+        """
+        基于ArrayTree的蒙特卡洛树搜索，接口与MCTS一致。
+
+        Args:
+            policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 策略价值函数，输入当前状态，输出每个动作的概率分布和当前状态的价值。
+            c_puct (float, optional):UCT公式中的探索系数，用于平衡探索和利用。默认为1.0。
+            n_playout (int, optional):每次模拟游戏进行的次数。默认为2000。
+            undo (bool, optional):为True时所有模拟在同一个游戏对象上落子并通过undo_move撤销。默认为False。
+            capacity (int, optional):搜索树初始容量。默认为4096。
+            time_limit (float|None, optional):每步搜索的时间上限（秒）。默认为None。
+            max_nodes (int|None, optional):搜索树节点数上限。默认为None。
+            early_stop (bool, optional):最佳根动作已无法被超越时提前停止。默认为False。
+            profile (bool, optional):是否记录分阶段耗时与计数，见MCTS。默认为False。
+            hook (Callable[[SearchStats], None]|None, optional):每次get_move结束后调用的回调，见MCTS。默认为None。
+
+        Returns:
+            None
+        """
+        super().__init__(policy_value_fn, c_puct, n_playout, undo, time_limit=time_limit, max_nodes=max_nodes, early_stop=early_stop,
+                         profile=profile, hook=hook)
+        self.tree = ArrayTree(capacity)
+        self.root = None
+
+    def _descend(self, state:Game) -> tuple[int, int]:
+        """
+        自根节点按PUCT公式向下选择到叶节点，并在state上执行沿途的落子。playout与playout_profiled见MCTS。
+
+        Args:
+            state (Game): 当前游戏状态。
+
+        Returns:
+            tuple[int, int]: 到达的叶节点编号与执行的落子数。
+
+        """
+        tree = self.tree
+        node = tree.root
+        depth = 0
+        while tree.n_children[node]:
+            node = tree.select(node, self.c_puct)
+            state.do_move(int(tree.action[node]))
+            depth += 1
+        return node, depth
+
+    def _expand_leaf(self, node:int, state:Game, action_probs:list[tuple[int, float]], leaf_value:float) -> tuple[float, int]:
+        """
+        对局未结束时按先验概率展开叶节点，否则以终局结果替换网络估值。
+
+        Args:
+            node (int): 叶节点编号。
+            state (Game): 叶节点对应的游戏状态。
+            action_probs (list[tuple[int, float]]): 策略价值函数给出的动作先验。
+            leaf_value (float): 策略价值函数给出的叶节点价值。
+
+        Returns:
+            tuple[float, int]: 叶节点行棋方视角的价值，以及新建的子节点数（终局时为0）。
+
+        """
+        end, winner = state.game_end()
+        if end:
+            return terminal_value(state, winner), 0
+        self.tree.expand(node, action_probs)
+        return leaf_value, int(self.tree.n_children[node])
+
+    def _backup(self, node:int, value:float) -> None:
+        self.tree.backup(node, value)
+
+    def root_visits(self, state:Game) -> int:
+        """
+        获取根节点当前的访问次数。
+
+        Args:
+            state (Game): 游戏当前状态。
+
+        Returns:
+            int: 根节点访问次数。
+
+        """
+        return int(self.tree.N[self.tree.root])
+
+    def root_child_visits(self, state:Game) -> dict[int, float]:
+        """
+        获取根节点各子节点的访问次数。
+
+        Args:
+            state (Game): 游戏当前状态。
+
+        Returns:
+            dict[int, float]: 动作到访问次数的映射。
+
+        """
+        tree = self.tree
+        return {int(tree.action[c]): float(tree.N[c]) for c in tree.children(tree.root)}
+
+    def tree_size(self) -> int:
+        return self.tree.size
+
+    def update_with_move(self, last_move: int) -> None:
+        """
+        根据上一步的移动更新树结构。
+
+        Args:
+            last_move (int): 上一步的移动id
+
+        Returns:
+            None
+
+        """
+        tree = self.tree
+        for child in tree.children(tree.root):
+            if tree.action[child] == last_move:
+                tree.promote(child)
+                return
+        tree.reset()
@@ -0,0 +1,149 @@
+import numpy as np
+
+import tables
+from bitgame import BitGame, ZOBRIST_QUEUE, ZOBRIST_SIDE
+from tables import FULL_MASK
+
+def _build_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    将 tables 中的落子效果表转换为NumPy数组，以便按整批下标取值。
+
+    Args:
+        None
+
+    Returns:
+        tuple: NEXT_QUEUE[队列, 落子]、VANISHED[队列, 落子]、QUEUE_MASK[队列]、WIN[掩码]、CELLS[掩码, 格子]。
+
+    """
+    next_queue = np.array(tables.NEXT_QUEUE, dtype=np.uint16).reshape(0x1000, 9)
+    vanished = np.array(tables.VANISHED, dtype=np.int8).reshape(0x1000, 9)
+    masks = np.array(tables.QUEUE_MASK, dtype=np.uint16)
+    win = np.array(tables.HAS_LINE, dtype=bool)
+    cells = (np.arange(512)[:, None] >> np.arange(9)) & 1 == 1
+    return next_queue, vanished, masks, win, cells
+
+NEXT_QUEUE, VANISHED, QUEUE_MASK, WIN, CELLS = _build_tables()
+
+class BatchGame:
+    def __init__(self, batch_size:int, start_player:int|np.ndarray=1, auto_reset:bool=True) -> None:
+        """
+        以NumPy数组同时保存B局游戏的状态，所有操作对整批游戏向量化执行，规则与 game.Game.do_move 一致。
+
+        Args:
+            batch_size (int): 同时进行的对局数B。
+            start_player (int|np.ndarray, optional): 每局的先手玩家编号，可为标量或长度为B的数组。默认为1。
+            auto_reset (bool, optional): 为True时，结束的对局在do_move返回后自动重新开始。默认为True。
+
+        Returns:
+            None
+
+        """
+        self.batch_size = batch_size
+        self.auto_reset = auto_reset
+        self.start_player = np.broadcast_to(np.asarray(start_player, dtype=np.int8), (batch_size,)).copy()
+        self.queues = np.zeros((batch_size, 2), dtype=np.uint16)
+        self.masks = np.zeros((batch_size, 2), dtype=np.uint16)
+        self.current_player = self.start_player.copy()
+        self.winner = np.zeros(batch_size, dtype=np.int8)
+        self.tie = np.zeros(batch_size, dtype=bool)
+        self.n_moves = np.zeros(batch_size, dtype=np.int32)
+        self._index = np.arange(batch_size)
+
+    def reset(self, which:np.ndarray|None=None) -> None:
+        """
+        重新开始指定的对局。
+
+        Args:
+            which (np.ndarray|None, optional): 需要重置的对局的bool掩码，None表示全部。默认为None。
+
+        Returns:
+            None
+
+        """
+        if which is None:
+            which = slice(None)
+        self.queues[which] = 0
+        self.masks[which] = 0
+        self.current_player[which] = self.start_player[which]
+        self.winner[which] = 0
+        self.tie[which] = False
+        self.n_moves[which] = 0
+
+    def legal_mask(self) -> np.ndarray:
+        """
+        获取每局当前的合法落子掩码。
+
+        Args:
+            None
+
+        Returns:
+            np.ndarray: 形状为(B, 9)的bool数组。
+
+        """
+        return ~CELLS[self.masks[:, 0] | self.masks[:, 1]]
+
+    def game_end(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        判断每局是否结束。
+
+        Args:
+            None
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 结束标志(B,) bool，以及获胜者编号(B,) int8（未结束或和棋为0）。
+
+        """
+        return (self.winner > 0) | self.tie, self.winner.copy()
+
+    def do_move(self, actions:np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        每局同时执行一步落子。已结束且未自动重置的对局忽略其动作。
+
+        Args:
+            actions (np.ndarray): 形状为(B,)的落子位置ID。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 本步后的结束标志与获胜者编号（自动重置前的结果）。
+
+        """
+        actions = np.asarray(actions)
+        active = ~((self.winner > 0) | self.tie)
+        idx = self._index[active]
+        a = actions[active]
+        if np.any(CELLS[self.masks[idx, 0] | self.masks[idx, 1], a]):
+            raise ValueError('存在落在已有棋子位置上的动作')
+        p = self.current_player[idx].astype(np.intp) - 1
+        queues = NEXT_QUEUE[self.queues[idx, p], a]
+        masks = QUEUE_MASK[queues]
+        self.queues[idx, p] = queues
+        self.masks[idx, p] = masks
+        self.winner[idx] = np.where(WIN[masks], self.current_player[idx], 0)
+        self.tie[idx] = (self.masks[idx, 0] | self.masks[idx, 1]) == FULL_MASK
+        self.current_player[idx] = 3 - self.current_player[idx]
+        self.n_moves[idx] += 1
+        done, winner = self.game_end()
+        if self.auto_reset and done.any():
+            self.reset(done)
+        return done, winner
+
+    def to_game(self, i:int) -> BitGame:
+        """
+        将第i局转换为BitGame，便于检查或交给MCTS搜索（不包含历史记录）。
+
+        Args:
+            i (int): 对局下标。
+
+        Returns:
+            BitGame: 对应的游戏对象。
+
+        """
+        game = BitGame()
+        game.init_board(int(self.current_player[i]))
+        game.player1, game.player2 = int(self.queues[i, 0]), int(self.queues[i, 1])
+        game.mask1, game.mask2 = int(self.masks[i, 0]), int(self.masks[i, 1])
+        game.winner = int(self.winner[i]) or None
+        game.tie = bool(self.tie[i])
+        game.zobrist = ZOBRIST_QUEUE[0][game.player1] ^ ZOBRIST_QUEUE[1][game.player2]
+        if game.current_player == 2:
+            game.zobrist ^= ZOBRIST_SIDE
+        return game
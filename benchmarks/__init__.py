@@ -0,0 +1 @@
+from .runner import compare, load_results, measure, measure_memory, save_results
@@ -0,0 +1,53 @@
+import argparse
+import fnmatch
+import sys
+
+from .cases import collect
+from .runner import compare, load_results, save_results
+
+def run(pattern: str | None = None, quick: bool = False) -> dict[str, dict[str, float]]:
+    """
+    依次运行所有名称匹配的基准并打印结果。
+
+    Args:
+        pattern (str | None, optional): 基准名的通配符模式，例如 'game/*'，None表示全部。默认为None。
+        quick (bool, optional): 是否使用快速模式。默认为False。
+
+    Returns:
+        dict[str, dict[str, float]]: 基准名到指标字典的映射。
+
+    """
+    results = {}
+    for name, bench in collect(quick):
+        if pattern and not fnmatch.fnmatch(name, pattern):
+            continue
+        result = bench()
+        results[name] = result
+        if 'bytes_per_node' in result:
+            print(f'{name:<36} {result["bytes_per_node"]:>12.1f} 字节/节点  （{result["nodes"]}个节点）')
+        elif 'playouts_per_sec' in result:
+            print(f'{name:<36} {result["ops_per_sec"]:>12.2f} 次/秒  （{result["playouts_per_sec"]:.0f}次模拟/秒）')
+        else:
+            print(f'{name:<36} {result["ops_per_sec"]:>12.0f} 次/秒')
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='游戏与搜索热点路径的性能基准')
+    parser.add_argument('-k', '--pattern', default=None, help="只运行名称匹配该通配符的基准，例如 'game/BitGame/*'")
+    parser.add_argument('-o', '--out', default='benchmark.json', help='结果输出文件')
+    parser.add_argument('-b', '--baseline', default=None, help='与之比较的基线结果文件')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1, help='允许的相对退化比例，默认为0.1（10%%）')
+    parser.add_argument('--quick', action='store_true', help='缩短计时并减少搜索规模')
+    args = parser.parse_args()
+
+    results = run(args.pattern, args.quick)
+    save_results(results, args.out, {'quick': args.quick, 'pattern': args.pattern})
+    print(f'已写入 {args.out}')
+    if args.baseline:
+        rows = compare(results, load_results(args.baseline), args.threshold)
+        regressed = [row for row in rows if row['regressed']]
+        for row in rows:
+            flag = '退化' if row['regressed'] else ''
+            print(f'{row["name"]:<36} {row["metric"]:<16} {row["baseline"]:>12.1f} -> {row["current"]:>12.1f} {row["change"]:>+8.1%} {flag}')
+        print(f'共比较{len(rows)}项，退化{len(regressed)}项（阈值{args.threshold:.0%}）')
+        sys.exit(1 if regressed else 0)
@@ -0,0 +1,185 @@
+import copy
+import random
+from functools import partial
+from typing import Callable
+
+from array_mcts import ArrayMCTS
+from bitgame import BitGame
+from game import Game, get_legal_position_id, is_win
+from mcts import MCTS, TreeNode
+from play import policy_value_fn
+from transposition import TTMCTS
+
+from .runner import measure, measure_memory
+
+# 参与比较的游戏实现，值为无参数的构造函数
+GAMES = {
+    'Game': Game,
+    'BitGame': BitGame,
+    'Game5x5k4': partial(Game, 5, 5, 4, 4),
+    'Game12x12k5': partial(Game, 12, 12, 5, 5),
+}
+
+# 大棋盘上的搜索基准所用的游戏，12x12的落子位置ID超出int8范围
+LARGE_GAMES = ('Game5x5k4', 'Game12x12k5')
+
+# 参与比较的搜索实现，均以undo_move原地搜索
+ENGINES = {
+    'MCTS': lambda n_playout: MCTS(policy_value_fn, 1.0, n_playout, undo=True),
+    'ArrayMCTS': lambda n_playout: ArrayMCTS(policy_value_fn, 1.0, n_playout, undo=True),
+    'TTMCTS': lambda n_playout: TTMCTS(policy_value_fn, 1.0, n_playout, undo=True),
+}
+
+N_PLAYOUTS = (100, 400, 1600)
+QUICK_N_PLAYOUTS = (100, 400)
+
+# 双方都已有三颗棋子且无人获胜的局面，在默认棋盘上再走NEXT_MOVE会使玩家1最早的棋子消失
+MID_MOVES = (0, 4, 1, 2, 6, 3)
+NEXT_MOVE = 5
+
+def mid_game(game_cls: Callable[[], Game]) -> Game:
+    """
+    构造用于基准测试的中局局面。
+
+    Args:
+        game_cls (Callable[[], Game]): 游戏构造函数，GAMES中的值。
+
+    Returns:
+        Game: 走完MID_MOVES后的游戏对象。
+
+    """
+    game = game_cls()
+    game.init_board(1)
+    for move in MID_MOVES:
+        game.do_move(move)
+    return game
+
+def _repeat(fn: Callable[[], object]) -> Callable[[int], Callable[[], None]]:
+    """
+    将无状态的单次操作包装为measure所需的工厂。
+
+    Args:
+        fn (Callable[[], object]): 单次操作。
+
+    Returns:
+        Callable[[int], Callable[[], None]]: measure使用的工厂。
+
+    """
+    def make(number: int) -> Callable[[], None]:
+        def run() -> None:
+            for _ in range(number):
+                fn()
+        return run
+    return make
+
+def _do_move(game_cls: Callable[[], Game]) -> Callable[[int], Callable[[], None]]:
+    # 计时前预先复制好number个局面，计时部分只包含do_move
+    base = mid_game(game_cls)
+
+    def make(number: int) -> Callable[[], None]:
+        games = [copy.deepcopy(base) for _ in range(number)]
+
+        def run() -> None:
+            for game in games:
+                game.do_move(NEXT_MOVE)
+        return run
+    return make
+
+def _expanded_node() -> TreeNode:
+    # 根节点展开全部9个子节点，并带有一定的访问统计，使select的各分支都被比较
+    rng = random.Random(0)
+    root = TreeNode(None, 1.0)
+    root.expand([(move, 1.0 / 9) for move in range(9)])
+    for _, child in root.child_items():
+        for _ in range(rng.randint(1, 20)):
+            child.update(rng.uniform(-1.0, 1.0))
+    root.n_visits = sum(child.n_visits for _, child in root.child_items())
+    return root
+
+def _get_move(engine: Callable[[int], MCTS], n_playout: int, game_cls: Callable[[], Game] = BitGame) -> Callable[[int], Callable[[], None]]:
+    state = game_cls()
+    state.init_board(1)
+
+    def make(number: int) -> Callable[[], None]:
+        random.seed(0)
+        players = [engine(n_playout) for _ in range(number)]
+
+        def run() -> None:
+            for player in players:
+                player.get_move(state)
+        return run
+    return make
+
+def _search_memory(engine: Callable[[int], MCTS], n_playout: int) -> Callable[[], tuple[object, int]]:
+    def build() -> tuple[object, int]:
+        random.seed(0)
+        state = BitGame()
+        state.init_board(1)
+        player = engine(n_playout)
+        player.get_move(state)
+        return player, player.tree_size()
+    return build
+
+def collect(quick: bool = False) -> list[tuple[str, Callable[[], dict[str, float]]]]:
+    """
+    列出全部基准。每项为(名称, 测量函数)，测量函数返回指标字典，由调用者决定是否运行。
+
+    Args:
+        quick (bool, optional): 为True时缩短计时并减少搜索规模，用于快速检查。默认为False。
+
+    Returns:
+        list[tuple[str, Callable[[], dict[str, float]]]]: 基准列表。
+
+    """
+    repeat, min_time = (3, 0.05) if quick else (5, 0.2)
+
+    def timed(make: Callable[[int], Callable[[], None]]) -> Callable[[], dict[str, float]]:
+        return lambda: measure(make, repeat, min_time)
+
+    cases = []
+    for name, game_cls in GAMES.items():
+        game = mid_game(game_cls)
+        cases += [
+            (f'game/{name}/do_move', timed(_do_move(game_cls))),
+            # undo_move远快于复制局面，无法像do_move那样预先准备，因此与do_move成对计时
+            (f'game/{name}/do_move+undo_move', timed(_repeat(lambda game=game: (game.do_move(NEXT_MOVE), game.undo_move())))),
+            (f'game/{name}/availables', timed(_repeat(lambda game=game: game.availables))),
+            (f'game/{name}/state', timed(_repeat(lambda game=game: game.state))),
+            (f'game/{name}/game_end', timed(_repeat(game.game_end))),
+            (f'game/{name}/deepcopy', timed(_repeat(lambda game=game: copy.deepcopy(game)))),
+        ]
+    board = mid_game(Game).board
+    cases += [
+        ('game/is_win', timed(_repeat(lambda: is_win(board, 1)))),
+        ('game/get_legal_position_id', timed(_repeat(lambda: get_legal_position_id(board)))),
+    ]
+
+    root = _expanded_node()
+    child = root.child(4)
+    cases += [
+        ('tree/TreeNode/select', timed(_repeat(lambda: root.select(1.0)))),
+        ('tree/TreeNode/get_score', timed(_repeat(lambda: child.get_score(1.0)))),
+    ]
+
+    for n_playout in QUICK_N_PLAYOUTS if quick else N_PLAYOUTS:
+        for name, engine in ENGINES.items():
+            def search(engine=engine, n_playout=n_playout) -> dict[str, float]:
+                result = measure(_get_move(engine, n_playout), min(repeat, 3), min_time)
+                result['playouts_per_sec'] = result['ops_per_sec'] * n_playout
+                return result
+            cases.append((f'search/{name}/get_move/{n_playout}', search))
+
+    # 大棋盘的分支数与对局长度都远大于3x3，只测一种规模
+    n_playout = QUICK_N_PLAYOUTS[-1]
+    for game_name in LARGE_GAMES:
+        for name, engine in ENGINES.items():
+            def search(engine=engine, game_name=game_name) -> dict[str, float]:
+                result = measure(_get_move(engine, n_playout, GAMES[game_name]), min(repeat, 3), min_time)
+                result['playouts_per_sec'] = result['ops_per_sec'] * n_playout
+                return result
+            cases.append((f'search/{name}/get_move/{game_name}/{n_playout}', search))
+
+    n_playout = 5000 if quick else 20000
+    for name, engine in ENGINES.items():
+        cases.append((f'memory/{name}/{n_playout}', lambda engine=engine: measure_memory(_search_memory(engine, n_playout))))
+    return cases
@@ -0,0 +1,151 @@
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable
+
+# 各指标的优劣方向：True表示越大越好
+HIGHER_IS_BETTER = {
+    'ops_per_sec': True,
+    'playouts_per_sec': True,
+    'bytes_per_node': False,
+}
+
+def measure(make: Callable[[int], Callable[[], None]], repeat: int = 5, min_time: float = 0.2) -> dict[str, float]:
+    """
+    测量某个操作的吞吐量。make(number) 在计时之外完成准备工作（如预先复制游戏状态），
+    并返回一个执行number次操作的无参函数，只有该函数的执行被计时。
+
+    先按上一次的耗时估算并增大number，直到单次耗时不少于min_time，
+    再重复repeat次取最快的一次，以减小调度与缓存带来的噪声。
+
+    Args:
+        make (Callable[[int], Callable[[], None]]): 生成待计时函数的工厂。
+        repeat (int, optional): 重复次数。默认为5。
+        min_time (float, optional): 单次计时的最短时间（秒）。默认为0.2。
+
+    Returns:
+        dict[str, float]: 包含ops_per_sec（每秒操作数）与number（每次计时的操作数）。
+
+    """
+    number = 1
+    while True:
+        run = make(number)
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number = max(2 * number, int(number * min_time / max(elapsed, 1e-9)) + 1)
+    best = elapsed
+    for _ in range(repeat - 1):
+        run = make(number)
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return {'ops_per_sec': number / best, 'number': number}
+
+def measure_memory(build: Callable[[], tuple[object, int]]) -> dict[str, float]:
+    """
+    用tracemalloc测量构建某个结构所分配且仍被持有的内存，并折算为每个节点的字节数。
+
+    Args:
+        build (Callable[[], tuple[object, int]]): 构建函数，返回构建出的对象（保持引用以免被回收）与其节点数。
+
+    Returns:
+        dict[str, float]: 包含bytes_per_node与nodes。
+
+    """
+    tracemalloc.start()
+    try:
+        obj, nodes = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del obj
+    return {'bytes_per_node': current / nodes, 'nodes': nodes}
+
+def environment() -> dict[str, str]:
+    """
+    记录运行环境，便于判断两份结果是否可比。
+
+    Args:
+        None
+
+    Returns:
+        dict[str, str]: Python版本、实现、平台与运行时间。
+
+    """
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+def save_results(results: dict[str, dict[str, float]], path: str, meta: dict | None = None) -> None:
+    """
+    将结果与运行环境写入JSON文件。
+
+    Args:
+        results (dict[str, dict[str, float]]): 基准名到指标字典的映射。
+        path (str): 输出文件路径。
+        meta (dict | None, optional): 额外记录的运行参数。默认为None。
+
+    Returns:
+        None
+
+    """
+    data = {'environment': environment(), 'meta': meta or {}, 'results': results}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def load_results(path: str) -> dict[str, dict[str, float]]:
+    """
+    读取save_results写入的结果文件。
+
+    Args:
+        path (str): 结果文件路径。
+
+    Returns:
+        dict[str, dict[str, float]]: 基准名到指标字典的映射。
+
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if 'results' not in data:
+        raise ValueError(f'{path} 不是基准结果文件')
+    return data['results']
+
+def compare(current: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float = 0.1) -> list[dict]:
+    """
+    将本次结果与基线逐项比较。只比较两边都存在的基准与HIGHER_IS_BETTER中列出的指标。
+
+    Args:
+        current (dict[str, dict[str, float]]): 本次结果。
+        baseline (dict[str, dict[str, float]]): 基线结果。
+        threshold (float, optional): 允许的相对退化比例，例如0.1表示变差超过10%即视为退化。默认为0.1。
+
+    Returns:
+        list[dict]: 每项包含name、metric、baseline、current、change（相对变化，正数表示变好）与regressed。
+
+    """
+    rows = []
+    for name in sorted(current.keys() & baseline.keys()):
+        for metric, higher in HIGHER_IS_BETTER.items():
+            if metric not in current[name] or metric not in baseline[name]:
+                continue
+            old, new = baseline[name][metric], current[name][metric]
+            if not old:
+                continue
+            change = (new - old) / old if higher else (old - new) / old
+            rows.append({
+                'name': name,
+                'metric': metric,
+                'baseline': old,
+                'current': new,
+                'change': change,
+                'regressed': change < -threshold,
+            })
+    return rows
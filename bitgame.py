@@ -0,0 +1,309 @@
+import random
+
+from game import Game, move_actions2move_id
+from tables import AVAILABLES, DISAPPEAR, FULL_MASK, MOVE_WINS, NEXT_MASK, NEXT_QUEUE, queue_push
+
+# Zobrist键：每位玩家的每个压缩棋子队列各对应一个64位随机数，另有一个表示轮到玩家2的键。
+# 局面键为两位玩家队列键与行棋方键的异或，落子时只需异或掉旧队列键并异或上新队列键。
+_rng = random.Random(20240802)
+ZOBRIST_QUEUE = (
+    tuple(_rng.getrandbits(64) for _ in range(0x1000)),
+    tuple(_rng.getrandbits(64) for _ in range(0x1000)),
+)
+ZOBRIST_SIDE = _rng.getrandbits(64)
+del _rng
+
+def has_packed_queues(state: Game) -> bool:
+    """
+    判断局面能否表示为压缩棋子队列：BitGame，或默认3x3、三子连线、每方3颗棋子规则的 game.Game。
+
+    Args:
+        state (Game): 游戏状态。
+
+    Returns:
+        bool: 能否调用game_queues。
+
+    """
+    if isinstance(state.player1, int):
+        return True
+    return (state.width, state.height, state.n_in_row, state.n_stones) == (3, 3, 3, 3)
+
+def game_queues(state: Game) -> tuple[int, int]:
+    """
+    获取当前行棋方与对手的压缩棋子队列，兼容 game.Game（仅限默认规则）与 BitGame。
+
+    Args:
+        state (Game): 游戏状态。
+
+    Returns:
+        tuple[int, int]: 当前行棋方的压缩队列与对手的压缩队列。
+
+    Raises:
+        ValueError: 棋盘大小、连子数或每方棋子数不是默认的3x3规则时，压缩队列无法表示该局面。
+
+    """
+    if not has_packed_queues(state):
+        raise ValueError(f'压缩棋子队列只支持3x3棋盘、三子连线、每方3颗棋子的规则，'
+                         f'实际为{state.width}x{state.height}、{state.n_in_row}子连线、每方{state.n_stones}颗棋子')
+    queues = []
+    for player in (state.player1, state.player2):
+        if isinstance(player, int):
+            queues.append(player)
+            continue
+        queue = 0
+        for pos in player[1:]:
+            if pos:
+                queue, _ = queue_push(queue, move_actions2move_id[pos])
+        queues.append(queue)
+    if state.current_player == 1:
+        return queues[0], queues[1]
+    return queues[1], queues[0]
+
+class BitGame:
+    """
+    以位棋盘实现的计客超级井字棋游戏环境，接口与 game.Game 保持一致。
+
+    两位玩家的棋子分别保存为9位整数掩码 mask1/mask2，
+    player1/player2 为压缩后的棋子队列（见 queue_push），
+    zobrist 为随落子增量更新的局面键（棋子、棋龄与行棋方）。
+    落子、合法位置与消失棋子均直接查 tables 中的预计算表。
+    """
+
+    def __init__(self) -> None:
+        self.mask1 = 0
+        self.mask2 = 0
+        self.player1 = 0
+        self.player2 = 0
+        self.current_player = 1
+        self.winner = None
+        self.tie = False
+        self.history = []
+        self.zobrist = ZOBRIST_QUEUE[0][0] ^ ZOBRIST_QUEUE[1][0]
+
+    def init_board(self, start_player: int) -> None:
+        """
+        初始化游戏棋盘和玩家状态。
+
+        Args:
+            start_player (int): 起始玩家编号，1代表玩家1，2代表玩家2。
+
+        Returns:
+            None
+
+        """
+        self.mask1 = 0
+        self.mask2 = 0
+        self.player1 = 0
+        self.player2 = 0
+        if start_player == 1:
+            self.current_player = 1
+        else:
+            self.current_player = 2
+        self.winner = None
+        self.tie = False
+        self.history = []
+        self.zobrist = ZOBRIST_QUEUE[0][0] ^ ZOBRIST_QUEUE[1][0]
+        if self.current_player == 2:
+            self.zobrist ^= ZOBRIST_SIDE
+
+    def copy(self) -> 'BitGame':
+        """
+        复制当前游戏状态，仅复制若干整数，开销远小于 copy.deepcopy。
+
+        Args:
+            None
+
+        Returns:
+            BitGame: 新的游戏对象。
+
+        """
+        game = BitGame.__new__(BitGame)
+        self.clone_into(game)
+        return game
+
+    def clone_into(self, other: 'BitGame') -> None:
+        """
+        将当前游戏状态写入已有的游戏对象，避免重新分配对象。
+
+        Args:
+            other (BitGame): 目标游戏对象。
+
+        Returns:
+            None
+
+        """
+        other.mask1 = self.mask1
+        other.mask2 = self.mask2
+        other.player1 = self.player1
+        other.player2 = self.player2
+        other.current_player = self.current_player
+        other.winner = self.winner
+        other.tie = self.tie
+        other.history = self.history[:]
+        other.zobrist = self.zobrist
+
+    def __copy__(self) -> 'BitGame':
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict) -> 'BitGame':
+        return self.copy()
+
+    @property
+    def availables(self) -> tuple[int, ...]:
+        """
+        获取当前玩家可落子位置ID，直接返回预计算的只读元组。
+
+        Args:
+            None
+
+        Returns:
+            tuple[int, ...]: 当前玩家可落子位置ID，按字典序排列
+        """
+        return AVAILABLES[self.mask1 | self.mask2]
+
+    def do_move(self, move_id: int) -> None:
+        """
+        执行玩家落子。
+
+        Args:
+            move_id (int): 落子位置ID，从0到8。
+
+        Returns:
+            None
+        """
+        index = move_id
+        if self.current_player == 1:
+            self.history.append((self.player1, self.mask1, self.winner, self.tie, self.zobrist))
+            queue = self.player1
+            index += queue * 9
+            self.player1 = NEXT_QUEUE[index]
+            self.mask1 = NEXT_MASK[index]
+            self.zobrist ^= ZOBRIST_QUEUE[0][queue] ^ ZOBRIST_QUEUE[0][self.player1] ^ ZOBRIST_SIDE
+        else:
+            self.history.append((self.player2, self.mask2, self.winner, self.tie, self.zobrist))
+            queue = self.player2
+            index += queue * 9
+            self.player2 = NEXT_QUEUE[index]
+            self.mask2 = NEXT_MASK[index]
+            self.zobrist ^= ZOBRIST_QUEUE[1][queue] ^ ZOBRIST_QUEUE[1][self.player2] ^ ZOBRIST_SIDE
+
+        if MOVE_WINS[index]:
+            self.winner = self.current_player
+        if self.mask1 | self.mask2 == FULL_MASK:
+            self.tie = True
+        self.current_player = 3 - self.current_player
+
+    def undo_move(self) -> None:
+        """
+        撤销上一步落子，恢复消失的棋子以及胜负、平局和当前玩家状态。
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        queue, mask, self.winner, self.tie, self.zobrist = self.history.pop()
+        self.current_player = 3 - self.current_player
+        if self.current_player == 1:
+            self.player1, self.mask1 = queue, mask
+        else:
+            self.player2, self.mask2 = queue, mask
+
+    def is_win(self) -> tuple[bool, int]:
+        """
+        判断当前玩家是否获胜。
+
+        Args:
+            None
+
+        Returns:
+            bool: 若当前玩家获胜则返回True，否则返回False。
+            int: 若当前玩家获胜，则返回该玩家的编号，否则返回None。
+        """
+        if self.winner is not None:
+            return True, self.winner
+        return False, None
+
+    def game_end(self) -> tuple[bool, int]:
+        """
+        判断游戏是否结束，并返回结束标志和获胜者编号。
+
+        Args:
+            无参数。
+
+        Returns:
+            一个包含两个元素的元组，第一个元素为bool类型，表示游戏是否结束；
+            第二个元素为int类型或None，表示获胜者编号，如果游戏未结束或平局则为None。
+
+        """
+        if self.winner is not None:
+            return True, self.winner
+        if self.tie:
+            return True, None
+        return False, None
+
+    @property
+    def board(self) -> list[list[int]]:
+        """
+        返回与 game.Game.board 相同格式的二维棋盘。
+
+        Args:
+            无参数。
+
+        Returns:
+            list[list[int]]: 3x3棋盘，0表示空位，1与2表示不同玩家的棋子。
+
+        """
+        _board = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
+        for i in range(9):
+            if self.mask1 >> i & 1:
+                _board[i // 3][i % 3] = 1
+            elif self.mask2 >> i & 1:
+                _board[i // 3][i % 3] = 2
+        return _board
+
+    @property
+    def disappear(self) -> tuple[tuple[int, int], ...]:
+        """
+        返回所有消失玩家位置。
+
+        Args:
+            无参数。
+
+        Returns:
+            包含所有消失玩家位置的元组，每个位置为一个元组，包含两个整数，分别表示行和列。
+
+        """
+        return DISAPPEAR[self.player1] + DISAPPEAR[self.player2]
+
+    @property
+    def state(self) -> list[list[int]]:
+        """
+        返回消除后棋盘的状态。
+
+        Args:
+            无参数。
+
+        Returns:
+            list[list[int]]: 返回一个二维列表，表示消除后棋盘的状态。
+
+        """
+        _state = self.board
+        for i, j in self.disappear:
+            _state[i][j] = 0
+        return _state
+
+    @property
+    def current_player_id(self) -> int:
+        """
+        获取当前玩家ID。
+
+        Args:
+            无参数。
+
+        Returns:
+            int: 当前玩家ID。
+
+        """
+        return self.current_player
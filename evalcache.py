@@ -0,0 +1,209 @@
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+
+from bitgame import game_queues, has_packed_queues
+from game import Game
+from solver import N_QUEUES, state_index
+
+def state_key(state: Game) -> int:
+    """
+    计算局面的紧凑键：双方压缩棋子队列（含棋龄）与行棋方拼成的25位整数，不同局面的键必然不同。
+    其他棋盘大小或规则的 game.Game 无法压缩，改用其zobrist键（含棋子、棋龄与行棋方的64位散列）。
+
+    Args:
+        state (Game): 游戏状态，game.Game 或 bitgame.BitGame。
+
+    Returns:
+        int: 局面键。
+
+    """
+    if not has_packed_queues(state):
+        return state.zobrist
+    own, opp = game_queues(state)
+    return (own << 13) | (opp << 1) | (state.current_player == 2)
+
+class EvalCache:
+    def __init__(self, policy_value_fn: Callable[[Game], tuple[list[tuple[int, float]], float]], capacity: int = 100000) -> None:
+        """
+        为策略价值函数加上有界的LRU缓存，同一局面只调用一次原函数。可直接作为policy_value_fn传给MCTS，
+        在同一次搜索内以及跨步搜索时复用已有的评估结果。原函数需对同一局面返回相同结果。
+
+        Args:
+            policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 被缓存的策略价值函数。
+            capacity (int, optional): 最多缓存的局面数，超出时淘汰最久未使用的局面。默认为100000。
+
+        Returns:
+            None
+
+        """
+        self.policy = policy_value_fn
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __call__(self, state: Game) -> tuple[list[tuple[int, float]], float]:
+        """
+        返回局面的动作先验与价值，未命中时调用原函数并缓存结果。返回的先验列表为缓存对象本身，调用者不应修改。
+
+        Args:
+            state (Game): 游戏状态。
+
+        Returns:
+            tuple[list[tuple[int, float]], float]: 动作先验列表与价值。
+
+        """
+        key = state_key(state)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+        self.misses += 1
+        entry = self.policy(state)
+        self.entries[key] = entry
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        """
+        获取缓存统计。
+
+        Args:
+            None
+
+        Returns:
+            dict[str, float]: 命中数、未命中数、淘汰数、当前大小与命中率。
+
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries), 'hit_rate': self.hit_rate}
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+# 共享缓存按 solver.state_index 与行棋方直接寻址，覆盖全部合法局面，无需淘汰
+SHARED_SLOTS = N_QUEUES * N_QUEUES * 2
+_PRIORS_BYTES = SHARED_SLOTS * 9 * 4
+_VALUES_BYTES = SHARED_SLOTS * 4
+
+class SharedEvalCache:
+    def __init__(self, policy_value_fn: Callable[[Game], tuple[list[tuple[int, float]], float]], name: str | None = None) -> None:
+        """
+        跨进程共享的策略价值缓存，数据保存在一块共享内存中：每个局面一个槽位，
+        依次存放9个float32先验、一个float32价值和一个已填充标志。
+        name为None时新建共享内存，否则连接到已有的共享内存。对象被pickle时只传递名称，
+        因此可以作为policy_value_fn交给进程池（如parallel.RootParallelMCTS），各工作进程自动连接同一块内存。
+
+        先验与价值以float32保存，原函数需对同一局面返回相同结果；多个进程同时写入同一槽位时写入的值相同，无需加锁。
+        命中统计只在本进程内累计。槽位覆盖默认3x3规则的全部局面，其他规则的局面会引发ValueError，请改用EvalCache。
+
+        Args:
+            policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 被缓存的策略价值函数，需可被pickle。
+            name (str | None, optional): 已有共享内存的名称。默认为None。
+
+        Returns:
+            None
+
+        """
+        self.policy = policy_value_fn
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=_PRIORS_BYTES + _VALUES_BYTES + SHARED_SLOTS)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        buf = self.shm.buf
+        self.priors = np.ndarray((SHARED_SLOTS, 9), dtype=np.float32, buffer=buf)
+        self.values = np.ndarray(SHARED_SLOTS, dtype=np.float32, buffer=buf, offset=_PRIORS_BYTES)
+        self.filled = np.ndarray(SHARED_SLOTS, dtype=np.uint8, buffer=buf, offset=_PRIORS_BYTES + _VALUES_BYTES)
+        if self.owner:
+            self.filled[:] = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __getstate__(self) -> dict:
+        return {'policy': self.policy, 'name': self.shm.name}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state['policy'], state['name'])
+
+    def __call__(self, state: Game) -> tuple[list[tuple[int, float]], float]:
+        """
+        返回局面的动作先验与价值，未命中时调用原函数并写入共享内存。
+
+        Args:
+            state (Game): 游戏状态。
+
+        Returns:
+            tuple[list[tuple[int, float]], float]: 动作先验列表与价值。
+
+        """
+        own, opp = game_queues(state)
+        slot = state_index(own, opp) * 2 + (state.current_player == 2)
+        if self.filled[slot]:
+            self.hits += 1
+            priors = self.priors[slot].tolist()
+            return [(move, priors[move]) for move in state.availables], float(self.values[slot])
+        self.misses += 1
+        action_probs, leaf_value = self.policy(state)
+        row = self.priors[slot]
+        for move, prob in action_probs:
+            row[move] = prob
+        self.values[slot] = leaf_value
+        # 先写数据再置标志，读取方看到标志时数据已完整
+        self.filled[slot] = 1
+        return action_probs, leaf_value
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        """
+        获取本进程的缓存统计以及全部进程共同填充的槽位数。
+
+        Args:
+            None
+
+        Returns:
+            dict[str, float]: 命中数、未命中数、已填充槽位数与命中率。
+
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': int(np.count_nonzero(self.filled)), 'hit_rate': self.hit_rate}
+
+    def close(self) -> None:
+        """
+        断开与共享内存的连接，创建方同时释放共享内存。
+
+        Args:
+            None
+
+        Returns:
+            None
+
+        """
+        del self.priors, self.values, self.filled
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,88 @@
+import numpy as np
+
+from bitgame import game_queues
+from game import Game
+
+# 平面0-2：当前行棋方最新、次新、最早的棋子；平面3-5：对手对应棋子；平面6：当前行棋方是否为玩家1
+N_PLANES = 7
+STATE_SHAPE = (N_PLANES, 3, 3)
+
+def encode_state(state: Game, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    将游戏状态编码为固定形状的张量，包含双方棋子位置与棋龄，便于向量化的评估函数使用。
+    当某方已有三颗棋子时，其最早的棋子（平面2或5）即为下一次该方落子时消失的棋子。
+
+    Args:
+        state (Game): 游戏状态，game.Game 或 bitgame.BitGame。
+        out (np.ndarray | None, optional): 形状为STATE_SHAPE的float32数组，给定时直接写入以避免分配。默认为None。
+
+    Returns:
+        np.ndarray: 形状为STATE_SHAPE的float32数组。
+
+    """
+    if out is None:
+        out = np.zeros(STATE_SHAPE, dtype=np.float32)
+    else:
+        out.fill(0.0)
+    flat = out.reshape(N_PLANES, 9)
+    for offset, queue in zip((0, 3), game_queues(state)):
+        # 队列最高的非空半字节为最新的棋子
+        cells = []
+        while queue:
+            cells.append((queue & 0xF) - 1)
+            queue >>= 4
+        for age, cell in enumerate(reversed(cells)):
+            flat[offset + age, cell] = 1.0
+    if state.current_player == 1:
+        flat[6] = 1.0
+    return out
+
+def encode_batch(states: list[Game], out: np.ndarray | None = None) -> np.ndarray:
+    """
+    批量编码游戏状态。
+
+    Args:
+        states (list[Game]): 游戏状态列表。
+        out (np.ndarray | None, optional): 形状至少为(len(states), *STATE_SHAPE)的float32数组。默认为None。
+
+    Returns:
+        np.ndarray: 形状为(len(states), *STATE_SHAPE)的float32数组。
+
+    """
+    if out is None:
+        out = np.empty((len(states),) + STATE_SHAPE, dtype=np.float32)
+    else:
+        out = out[:len(states)]
+    for i, state in enumerate(states):
+        encode_state(state, out[i])
+    return out
+
+def legal_mask(states: list[Game]) -> np.ndarray:
+    """
+    获取一批状态的合法落子掩码。
+
+    Args:
+        states (list[Game]): 游戏状态列表。
+
+    Returns:
+        np.ndarray: 形状为(len(states), 9)的bool数组。
+
+    """
+    mask = np.zeros((len(states), 9), dtype=bool)
+    for i, state in enumerate(states):
+        mask[i, state.availables] = True
+    return mask
+
+def masked_priors(probs: np.ndarray, states: list[Game]) -> list[list[tuple[int, float]]]:
+    """
+    将评估函数输出的(B, 9)概率矩阵按合法落子转换为MCTS所需的动作先验列表。
+
+    Args:
+        probs (np.ndarray): 形状为(B, 9)的动作概率。
+        states (list[Game]): 对应的游戏状态列表。
+
+    Returns:
+        list[list[tuple[int, float]]]: 每个状态的(动作, 先验概率)列表。
+
+    """
+    return [[(move, float(probs[i, move])) for move in state.availables] for i, state in enumerate(states)]
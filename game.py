@@ -1,232 +1,390 @@
 import os
-import copy
+import random
+import sys
+from functools import lru_cache
 
 init_board = [[' ', ' ', ' '],
               [' ', ' ', ' '],
               [' ', ' ', ' ']]
 
+# 连线的四个方向：横、竖、主对角线、副对角线
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
 def str2list(board: list[list[str]]) -> list[list[int]]:
     """
     将二维字符列表转换成二维整数列表。
-    
+
     Args:
         board (list[list[str]]): 二维字符列表，只包含字符' ','X','O'。
-    
+
     Returns:
         list[list[int]]: 二维整数列表，字符' ','X','O'分别被替换为整数0,1,2。
-    
+
     """
-    _board = [[0, 0, 0], [0, 0, 0], [0, 0, 0]]
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == ' ':
-                _board[i][j] = 0
-            elif board[i][j] == 'X':
-                _board[i][j] = 1
-            else:
-                _board[i][j] = 2
-    return _board
+    return [[0 if cell == ' ' else 1 if cell == 'X' else 2 for cell in row] for row in board]
 
 def list2str(board: list[list[int]]) -> list[list[str]]:
     """
     将二维整数列表转换成二维字符列表。
-    
+
     Args:
         board (list[list[int]]): 二维整数列表，只包含整数0,1,2。
-    
+
     Returns:
         list[list[str]]: 二维字符列表，整数0被替换为字符' '，整数1被替换为字符'X'，整数2被替换为字符'O'。
     """
-    _board = [[' ', ' ', ' '], [' ', ' ', ' '], [' ', ' ', ' ']]
-    for i in range(len(board)):
-        for j in range(len(board[i])):
-            if board[i][j] == 0:
-                _board[i][j] = ' '
-            elif board[i][j] == 1:
-                _board[i][j] = 'X'
-            else:
-                _board[i][j] = 'O'
-    return _board
+    return [[' ' if cell == 0 else 'X' if cell == 1 else 'O' for cell in row] for row in board]
 
 def print_board(board: list[list[int]], disappear: list[tuple[int]]=[]) -> None:
     """
-    打印井字棋游戏棋盘，并可在指定位置标记即将消失的棋子。
-    
+    打印任意大小的游戏棋盘，并可在指定位置标记即将消失的棋子。
+
     Args:
-        board (list[list[int]]): 井字棋游戏棋盘，每个元素为一个数字，表示对应位置的棋子或空格。
+        board (list[list[int]]): 游戏棋盘，每个元素为一个数字，表示对应位置的棋子或空格。
         disappear (list[tuple[int]], optional): 即将消失的棋子的位置列表，每个元素为一个包含两个整数的元组，分别表示行索引和列索引。默认为空列表。
-    
+
     Returns:
         None
-    
+
     """
 
     os.system('cls')
-    _board = list2str(copy.deepcopy(board))
-    if len(disappear) > 0:
-        for i, j in disappear:
-            _board[i][j] = '\033[2m{}\033[0m'.format(_board[i][j])
-    print(' {} | {} | {} '.format(_board[0][0], _board[0][1], _board[0][2]))
-    print('---|---|---')
-    print(' {} | {} | {} '.format(_board[1][0], _board[1][1], _board[1][2]))
-    print('---|---|---')
-    print(' {} | {} | {} '.format(_board[2][0], _board[2][1], _board[2][2]))
-
-def is_win(board: list[list[int]], player: int) -> bool:
+    _board = list2str(board)
+    for i, j in disappear:
+        _board[i][j] = '\033[2m{}\033[0m'.format(_board[i][j])
+    for i, row in enumerate(_board):
+        if i:
+            print('|'.join(['---'] * len(row)))
+        print('|'.join(f' {cell} ' for cell in row))
+
+def is_win(board: list[list[int]], player: int, n_in_row: int = 3) -> bool:
     """
-    判断玩家是否在棋盘上获胜。
-    
+    扫描整个棋盘，判断玩家是否已有n_in_row颗棋子连成一线。对局中只需检查经过最后一步落子的线，见Game.do_move。
+
     Args:
-        board (list[list[int]]): 3x3的棋盘，每个位置上的整数表示该位置上的棋子所属玩家，0表示空位置。
+        board (list[list[int]]): 棋盘，每个位置上的整数表示该位置上的棋子所属玩家，0表示空位置。
         player (int): 玩家编号，1或2。
-    
+        n_in_row (int, optional): 获胜所需的连子数。默认为3。
+
     Returns:
         bool: 若玩家在棋盘上获胜则返回True，否则返回False。
-    
+
     """
-    # 对角线
-    if board[0][0] == player and board[1][1] == player and board[2][2] == player:
-        return True
-    elif board[0][2] == player and board[1][1] == player and board[2][0] == player:
-        return True
-    # 横线
-    for i in range(3):
-        if board[i][0] == player and board[i][1] == player and board[i][2] == player:
-            return True
-    # 竖线
-    for j in range(3):
-        if board[0][j] == player and board[1][j] == player and board[2][j] == player:
+    for line in board_lines(len(board[0]), len(board), n_in_row):
+        for y, x in line:
+            if board[y][x] != player:
+                break
+        else:
             return True
     return False
 
-move_id2move_actions = {
-    0:(0, 0),
-    1:(0, 1),
-    2:(0, 2),
-    3:(1, 0),
-    4:(1, 1),
-    5:(1, 2),
-    6:(2, 0),
-    7:(2, 1),
-    8:(2, 2)
-}
-
-move_actions2move_id = {
-    (0, 0):0,
-    (0, 1):1,
-    (0, 2):2,
-    (1, 0):3,
-    (1, 1):4,
-    (1, 2):5,
-    (2, 0):6,
-    (2, 1):7,
-    (2, 2):8
-}
+@lru_cache(maxsize=None)
+def board_lines(width: int, height: int, n_in_row: int) -> tuple[tuple[tuple[int, int], ...], ...]:
+    """
+    列出棋盘上所有长度为n_in_row的线段，同一规格只计算一次。
+
+    Args:
+        width (int): 棋盘列数。
+        height (int): 棋盘行数。
+        n_in_row (int): 线段长度。
+
+    Returns:
+        tuple[tuple[tuple[int, int], ...], ...]: 每条线段为各格子坐标组成的元组。
+
+    """
+    lines = []
+    for y in range(height):
+        for x in range(width):
+            for dy, dx in DIRECTIONS:
+                line = tuple((y + i * dy, x + i * dx) for i in range(n_in_row))
+                if all(0 <= i < height and 0 <= j < width for i, j in line):
+                    lines.append(line)
+    return tuple(lines)
+
+def move_maps(width: int, height: int) -> tuple[dict[int, tuple[int, int]], dict[tuple[int, int], int]]:
+    """
+    按行优先顺序生成落子位置ID与(行, 列)坐标之间的映射。
+
+    Args:
+        width (int): 棋盘列数。
+        height (int): 棋盘行数。
+
+    Returns:
+        tuple[dict[int, tuple[int, int]], dict[tuple[int, int], int]]: 位置ID到坐标的映射，以及坐标到位置ID的映射。
+
+    """
+    id2actions = {y * width + x: (y, x) for y in range(height) for x in range(width)}
+    actions2id = {action: move_id for move_id, action in id2actions.items()}
+    return id2actions, actions2id
+
+move_id2move_actions, move_actions2move_id = move_maps(3, 3)
 
 def get_legal_position_id(board: list[list[int]]) -> list[int]:
     """
     获取在给定棋盘上所有合法的落子位置ID列表
-    
+
     Args:
-        board (list[list[int]]): 3x3棋盘，其中0表示空位，1与2表示不同玩家的棋子
-    
+        board (list[list[int]]): 棋盘，其中0表示空位，1与2表示不同玩家的棋子
+
     Returns:
         list[int]: 所有合法的落子位置ID列表，按字典序排列
-    
+
     """
     ans = []
-    for i in range(9):
-        y, x = move_id2move_actions[i]
-        if board[y][x] == 0:
-            ans.append(i)
+    move_id = 0
+    for row in board:
+        for cell in row:
+            if cell == 0:
+                ans.append(move_id)
+            move_id += 1
     return ans
 
+class BoardGeometry:
+    """
+    某一棋盘规格下与局面无关的预计算数据，同一规格的所有Game对象共享同一份，由board_geometry创建。
+
+    Attributes:
+        width (int): 棋盘列数。
+        height (int): 棋盘行数。
+        n_in_row (int): 获胜所需的连子数。
+        n_stones (int): 每方最多保留的棋子数，再落子时最早的一颗消失。
+        move_id2move_actions (dict[int, tuple[int, int]]): 位置ID到坐标的映射。
+        move_actions2move_id (dict[tuple[int, int], int]): 坐标到位置ID的映射。
+        rays (tuple): rays[位置ID]为经过该格子、足够长的各条线，每条线为(正向格子, 反向格子)，各至多n_in_row-1格。
+        zobrist (tuple): zobrist[玩家-1][棋龄][位置ID]为64位随机数，棋龄0为最早的棋子。
+        zobrist_side (int): 轮到玩家2时异或的键。
+    """
+
+    def __init__(self, width: int, height: int, n_in_row: int, n_stones: int) -> None:
+        self.width = width
+        self.height = height
+        self.n_in_row = n_in_row
+        self.n_stones = n_stones
+        self.move_id2move_actions, self.move_actions2move_id = move_maps(width, height)
+        rays = []
+        for y, x in self.move_id2move_actions.values():
+            lines = []
+            for dy, dx in DIRECTIONS:
+                forward = self._ray(y, x, dy, dx)
+                backward = self._ray(y, x, -dy, -dx)
+                if len(forward) + len(backward) + 1 >= n_in_row:
+                    lines.append((forward, backward))
+            rays.append(tuple(lines))
+        self.rays = tuple(rays)
+        rng = random.Random(f'{width}x{height}/{n_in_row}/{n_stones}')
+        self.zobrist = tuple(tuple(tuple(rng.getrandbits(64) for _ in range(width * height)) for _ in range(n_stones))
+                             for _ in range(2))
+        self.zobrist_side = rng.getrandbits(64)
+
+    def _ray(self, y: int, x: int, dy: int, dx: int) -> tuple[tuple[int, int], ...]:
+        cells = []
+        for i in range(1, self.n_in_row):
+            i_y, i_x = y + i * dy, x + i * dx
+            if not (0 <= i_y < self.height and 0 <= i_x < self.width):
+                break
+            cells.append((i_y, i_x))
+        return tuple(cells)
+
+@lru_cache(maxsize=None)
+def board_geometry(width: int, height: int, n_in_row: int, n_stones: int) -> BoardGeometry:
+    """
+    获取某一棋盘规格的预计算数据，同一规格只计算一次。
+
+    Args:
+        width (int): 棋盘列数。
+        height (int): 棋盘行数。
+        n_in_row (int): 获胜所需的连子数。
+        n_stones (int): 每方最多保留的棋子数。
+
+    Returns:
+        BoardGeometry: 预计算数据。
+
+    """
+    if width < 1 or height < 1 or n_stones < 1:
+        raise ValueError(f'棋盘规格无效：{width}x{height}，每方{n_stones}颗棋子')
+    if not 1 <= n_in_row <= max(width, height):
+        raise ValueError(f'连子数{n_in_row}超出{width}x{height}棋盘')
+    return BoardGeometry(width, height, n_in_row, n_stones)
+
 class Game:
-    def __init__(self) -> None:
-        self.board = copy.deepcopy(str2list(init_board))
-        self.player1 = [False] * 4
-        self.player2 = [False] * 4
-    
+    def __init__(self, width: int = 3, height: int = 3, n_in_row: int = 3, n_stones: int = 3) -> None:
+        """
+        计客超级井字棋游戏环境，可推广到任意m×n棋盘、k子连线与每方保留的棋子数，默认参数即原版3x3规则。
+
+        落子在棋盘上原地修改，胜负只检查经过最后一步落子的线，空位数随落子增减，
+        zobrist为随落子增量更新的局面键（棋子、棋龄与行棋方），可用于置换表（见transposition.TTMCTS）。
+        copy.deepcopy会调用copy，只复制棋盘与队列，预计算数据在对象间共享。
+
+        Args:
+            width (int, optional): 棋盘列数。默认为3。
+            height (int, optional): 棋盘行数。默认为3。
+            n_in_row (int, optional): 获胜所需的连子数。默认为3。
+            n_stones (int, optional): 每方最多保留的棋子数，再落子时最早的一颗消失。默认为3。
+
+        Returns:
+            None
+
+        """
+        self.geometry = board_geometry(width, height, n_in_row, n_stones)
+        self.width = width
+        self.height = height
+        self.n_in_row = n_in_row
+        self.n_stones = n_stones
+        self.move_id2move_actions = self.geometry.move_id2move_actions
+        self.move_actions2move_id = self.geometry.move_actions2move_id
+        self.init_board(1)
+
     def init_board(self, start_player: int) -> None:
         """
         初始化游戏棋盘和玩家状态。
-        
+
         Args:
             start_player (int): 起始玩家编号，1代表玩家1，2代表玩家2。
-        
+
         Returns:
             None
-        
+
         """
-        self.board = copy.deepcopy(str2list(init_board))
-        self.player1 = [False] * 4
-        self.player2 = [False] * 4
+        self.board = [[0] * self.width for _ in range(self.height)]
+        self.n_empty = self.width * self.height
+        # 棋子队列：下标0暂存刚消失的棋子，其余按从旧到新保存坐标，未落子处为False
+        self.player1 = [False] * (self.n_stones + 1)
+        self.player2 = [False] * (self.n_stones + 1)
         if start_player == 1:
             self.current_player = 1
         else:
             self.current_player = 2
         self.winner = None
         self.tie = False
-    
+        self.history = []
+        self.zobrist = self.geometry.zobrist_side if self.current_player == 2 else 0
+
+    def copy(self) -> 'Game':
+        """
+        复制当前游戏状态，只复制棋盘行、棋子队列与历史记录，开销远小于逐层深拷贝。
+
+        Args:
+            None
+
+        Returns:
+            Game: 新的游戏对象。
+
+        """
+        game = Game.__new__(Game)
+        game.__dict__.update(self.__dict__)
+        game.board = [row[:] for row in self.board]
+        game.player1 = self.player1[:]
+        game.player2 = self.player2[:]
+        game.history = self.history[:]
+        return game
+
+    def __copy__(self) -> 'Game':
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict) -> 'Game':
+        return self.copy()
+
     @property
     def availables(self):
         """
         获取当前玩家可落子位置ID列表。
-        
+
         Args:
             None
-        
+
         Returns:
             list[int]: 当前玩家可落子位置ID列表，按字典序排列
         """
         return get_legal_position_id(self.board)
-        
+
+    def _queue_key(self, queue: list, player: int) -> int:
+        keys = self.geometry.zobrist[player - 1]
+        width = self.width
+        key = 0
+        for age, pos in enumerate(queue[1:]):
+            if pos:
+                key ^= keys[age][pos[0] * width + pos[1]]
+        return key
+
     def do_move(self, move_id: int) -> None:
         """
         执行玩家落子。
-        
+
         Args:
-            move_id (int): 落子位置ID，从0到8。
-        
+            move_id (int): 落子位置ID，从0到width*height-1。
+
         Returns:
             None
         """
-        y, x = move_id2move_actions[move_id]
-        _board = copy.deepcopy(self.board)
-        _board[y][x] = self.current_player
-        if self.current_player == 1:
-            self.player1.append((y, x))
-            if len(self.player1) >= 5:
-                self.player1.pop(0)
-        else:
-            self.player2.append((y, x))
-            if len(self.player2) >= 5:
-                self.player2.pop(0)
-
-        if self.player1[0]:
-            y, x = self.player1[0]
-            _board[y][x] = 0
-            self.player1[0] = False
-
-        if self.player2[0]:
-            y, x = self.player2[0]
-            _board[y][x] = 0
-            self.player2[0] = False
-
-        if is_win(_board, self.current_player):
-            self.winner = self.current_player
-        if all(0 not in row for row in _board):
+        y, x = self.move_id2move_actions[move_id]
+        board = self.board
+        player = self.current_player
+        queue = self.player1 if player == 1 else self.player2
+        zobrist = self.zobrist ^ self._queue_key(queue, player) ^ self.geometry.zobrist_side
+        board[y][x] = player
+        self.n_empty -= 1
+        queue.append((y, x))
+        queue.pop(0)
+        vanished = None
+        if queue[0]:
+            vanished = queue[0]
+            i, j = vanished
+            board[i][j] = 0
+            self.n_empty += 1
+            queue[0] = False
+
+        self.history.append((move_id, vanished, self.winner, self.tie, self.zobrist))
+        self.zobrist = zobrist ^ self._queue_key(queue, player)
+
+        # 其余棋子未变，只有经过本次落子的线可能连成
+        for forward, backward in self.geometry.rays[move_id]:
+            count = 1
+            for i, j in forward:
+                if board[i][j] != player:
+                    break
+                count += 1
+            for i, j in backward:
+                if board[i][j] != player:
+                    break
+                count += 1
+            if count >= self.n_in_row:
+                self.winner = player
+                break
+        if self.n_empty == 0:
             self.tie = True
+        self.current_player = 3 - player
+
+    def undo_move(self) -> None:
+        """
+        撤销上一步落子，恢复因超过棋子上限而消失的棋子以及胜负、平局、局面键和当前玩家状态。
+
+        Args:
+            None
+
+        Returns:
+            None
+        """
+        move_id, vanished, self.winner, self.tie, self.zobrist = self.history.pop()
         self.current_player = 3 - self.current_player
-        self.board = copy.deepcopy(_board)
-    
+        queue = self.player1 if self.current_player == 1 else self.player2
+        y, x = self.move_id2move_actions[move_id]
+        self.board[y][x] = 0
+        self.n_empty += 1
+        queue.pop()
+        if vanished:
+            i, j = vanished
+            self.board[i][j] = self.current_player
+            self.n_empty -= 1
+            queue[0] = vanished
+        queue.insert(0, False)
+
     def is_win(self) -> tuple[bool, int]:
         """
         判断当前玩家是否获胜。
-        
+
         Args:
             None
-        
+
         Returns:
             bool: 若当前玩家获胜则返回True，否则返回False。
             int: 若当前玩家获胜，则返回该玩家的编号，否则返回None。
@@ -234,18 +392,18 @@ class Game:
         if self.winner is not None:
             return True, self.winner
         return False, None
-    
+
     def game_end(self) -> tuple[bool, int]:
         """
         判断游戏是否结束，并返回结束标志和获胜者编号。
-        
+
         Args:
             无参数。
-        
+
         Returns:
             一个包含两个元素的元组，第一个元素为bool类型，表示游戏是否结束；
             第二个元素为int类型或None，表示获胜者编号，如果游戏未结束或平局则为None。
-        
+
         """
         done, winner = self.is_win()
         if done:
@@ -254,18 +412,18 @@ class Game:
             if self.tie:
                 return True, None
         return False, None
-    
+
     @property
     def disappear(self) -> list[tuple[int]]:
         """
         返回所有消失玩家位置列表。
-        
+
         Args:
             无参数。
-        
+
         Returns:
             包含所有消失玩家位置的列表，每个位置为一个元组，包含两个整数，分别表示行和列。
-        
+
         """
         ans = []
         if self.player1[1]:
@@ -275,20 +433,20 @@ class Game:
             i, j = self.player2[1]
             ans.append((i, j))
         return ans
-    
+
     @property
     def state(self) -> list[list[int]]:
         """
         返回消除后棋盘的状态。
-        
+
         Args:
             无参数。
-        
+
         Returns:
             list[list[int]]: 返回一个二维列表，表示消除后棋盘的状态。
-        
+
         """
-        _state = copy.deepcopy(self.board)
+        _state = [row[:] for row in self.board]
         for i, j in self.disappear:
             _state[i][j] = 0
         return _state
@@ -297,30 +455,31 @@ class Game:
     def current_player_id(self) -> int:
         """
         获取当前玩家ID。
-        
+
         Args:
             无参数。
-        
+
         Returns:
             int: 当前玩家ID。
-        
+
         """
         return self.current_player
 
 
 if __name__ == '__main__':
-    game = Game()
+    # python game.py [列数 行数 连子数 每方棋子数]
+    game = Game(*map(int, sys.argv[1:5]))
     game.init_board(1)
     while True:
         print_board(game.board, disappear=game.disappear)
         availables = game.availables
         move = tuple(map(int, input('请输入落子位置：').split()))
         move = (move[0] - 1, move[1] - 1)
-        move_id = move_actions2move_id[move]
+        move_id = game.move_actions2move_id.get(move)
         while move_id not in availables:
             move = tuple(map(int, input('请输入落子位置：').split()))
             move = (move[0] - 1, move[1] - 1)
-            move_id = move_actions2move_id[move]
+            move_id = game.move_actions2move_id.get(move)
         game.do_move(move_id)
         done, winner = game.game_end()
         if done:
@@ -329,4 +488,4 @@ if __name__ == '__main__':
                 print('平局！')
             else:
                 print(f'{"X" if winner == 1 else "O"}获胜！')
-            break
\ No newline at end of file
+            break
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import random
+import time
+
+import numpy as np
+
+from bitgame import BitGame
+
+async def client(host: str, port: int, n_games: int, latencies: list[float], results: dict[str, int]) -> None:
+    """
+    一个模拟客户端：在本地维护对局副本，随机选择合法落子，连续进行n_games局。
+
+    Args:
+        host (str): 服务器地址。
+        port (int): 服务器端口。
+        n_games (int): 对局数，先手在客户端与AI之间交替。
+        latencies (list[float]): 用于收集每条落子命令（含AI先手的NEW）往返耗时（秒）的列表。
+        results (dict[str, int]): 用于统计对局结果与错误数的字典。
+
+    Returns:
+        None
+
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(line: str, timed: bool = True) -> list[str]:
+        start = time.perf_counter()
+        writer.write(line.encode() + b'\n')
+        await writer.drain()
+        reply = (await reader.readline()).decode().split()
+        if timed:
+            latencies.append(time.perf_counter() - start)
+        if not reply or reply[0] == 'ERR':
+            results['error'] += 1
+        return reply
+
+    try:
+        for i in range(n_games):
+            game = BitGame()
+            ai_first = i % 2 == 1
+            game.init_board(2 if ai_first else 1)
+            reply = await request('NEW ai' if ai_first else 'NEW', timed=ai_first)
+            if reply and reply[0] == 'AI':
+                game.do_move(int(reply[1]))
+            while reply and reply[0] in ('OK', 'AI'):
+                move = random.choice(game.availables)
+                game.do_move(move)
+                reply = await request(f'MOVE {move}')
+                if reply and reply[0] == 'AI':
+                    game.do_move(int(reply[1]))
+            if reply and reply[0] == 'END':
+                results[reply[1]] += 1
+        await request('QUIT', timed=False)
+    finally:
+        writer.close()
+
+async def run(host: str, port: int, n_clients: int, n_games: int) -> dict[str, float]:
+    """
+    同时启动n_clients个客户端进行压测。
+
+    Args:
+        host (str): 服务器地址。
+        port (int): 服务器端口。
+        n_clients (int): 并发客户端数。
+        n_games (int): 每个客户端的对局数。
+
+    Returns:
+        dict[str, float]: 每秒落子数、延迟分位数（毫秒）以及对局结果统计。
+
+    """
+    latencies = []
+    results = {'you': 0, 'ai': 0, 'draw': 0, 'error': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, n_games, latencies, results) for _ in range(n_clients)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    summary = {'moves': len(latencies), 'moves_per_sec': len(latencies) / elapsed, 'elapsed': elapsed}
+    for p in (50, 90, 99):
+        summary[f'p{p}_ms'] = float(np.percentile(ms, p))
+    summary['max_ms'] = float(ms.max())
+    summary.update(results)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对弈服务器压测客户端')
+    parser.add_argument('--host', default='127.0.0.1', help='服务器地址')
+    parser.add_argument('--port', type=int, default=8765, help='服务器端口')
+    parser.add_argument('-c', '--clients', type=int, default=200, help='并发客户端数')
+    parser.add_argument('-g', '--games', type=int, default=2, help='每个客户端的对局数')
+    args = parser.parse_args()
+    summary = asyncio.run(run(args.host, args.port, args.clients, args.games))
+    print(f'落子请求数：{summary["moves"]} 耗时：{summary["elapsed"]:.1f}秒 每秒落子数：{summary["moves_per_sec"]:.1f}')
+    print(f'延迟（毫秒） p50：{summary["p50_ms"]:.1f} p90：{summary["p90_ms"]:.1f} p99：{summary["p99_ms"]:.1f} 最大：{summary["max_ms"]:.1f}')
+    print(f'客户端胜：{summary["you"]} AI胜：{summary["ai"]} 和棋：{summary["draw"]} 错误：{summary["error"]}')
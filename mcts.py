@@ -1,15 +1,23 @@
 import copy
-import numpy as np
+import math
+import time
+from dataclasses import asdict, dataclass
 from game import Game
 from typing import Any, Callable
 
+# 子节点数组的长度，即棋盘格子数；子节点按动作编号存放
+N_ACTIONS = 9
+
 class TreeNode:
-    def __init__(self, parent:int|None=None, prior_p:float=0.0):
+    __slots__ = ('parent', 'children', 'n_children', 'n_visits', 'Q', 'P', 'n_virtual')
+    
+    def __init__(self, parent:'TreeNode|None'=None, prior_p:float=0.0):
         """
-        初始化一个节点对象。
+        初始化一个节点对象。节点使用__slots__，子节点保存在按动作编号索引的定长列表中，
+        叶节点的children为None，不为子节点分配任何空间。
         
         Args:
-            parent (int|None): 当前节点的父节点编号，若当前节点为根节点，则为None。默认为None。
+            parent (TreeNode|None): 当前节点的父节点，若当前节点为根节点，则为None。默认为None。
             prior_p (float): 当前节点的先验概率。默认为0.0。
         
         Returns:
@@ -17,15 +25,16 @@ class TreeNode:
         
         """
         self.parent = parent
-        self.children = {}
+        self.children = None
+        self.n_children = 0
         self.n_visits = 0.0
         self.Q = 0.0
-        self.U = 0.0
         self.P = prior_p
+        self.n_virtual = 0
     
     def select(self, c_puct:float) -> tuple:
         """
-        从当前节点的子节点中选择一个最优节点。
+        从当前节点的子节点中选择一个最优节点。每次选择只计算一次父节点访问次数的平方根，得分不再保存到节点上。
         
         Args:
             c_puct (float): UCB公式中的参数，用于平衡探索和利用。
@@ -34,8 +43,29 @@ class TreeNode:
             tuple: 包含最优节点动作和对应节点对象的元组。
         
         """
-        return max(self.children.items(),
-                   key=lambda act_node: act_node[1].get_score(c_puct))
+        best_action = -1
+        best = None
+        best_score = -math.inf
+        if self.n_virtual:
+            # 批量搜索中尚未回传的路径按虚拟失败计入，使同一批次的模拟分散到不同叶节点
+            sqrt_n = math.sqrt(self.n_visits + self.n_virtual)
+            for action, child in enumerate(self.children):
+                if child is None:
+                    continue
+                n = child.n_visits + child.n_virtual
+                q = (child.Q * child.n_visits - child.n_virtual) / n if n else 0.0
+                score = q + c_puct * child.P * sqrt_n / (1 + n)
+                if score > best_score:
+                    best_action, best, best_score = action, child, score
+        else:
+            sqrt_n = math.sqrt(self.n_visits)
+            for action, child in enumerate(self.children):
+                if child is None:
+                    continue
+                score = child.Q + c_puct * child.P * sqrt_n / (1 + child.n_visits)
+                if score > best_score:
+                    best_action, best, best_score = action, child, score
+        return best_action, best
     
     def expand(self, action_priors:list[tuple[int, float]]) -> None:
         """
@@ -48,9 +78,45 @@ class TreeNode:
             None: 该方法无返回值，但会更新树节点的子节点。
         
         """
+        if not action_priors:
+            return
+        children = self.children
+        if children is None:
+            children = self.children = [None] * max(N_ACTIONS, max(action for action, _ in action_priors) + 1)
         for action, prob in action_priors:
-            if action not in self.children:
-                self.children[action] = TreeNode(parent=self, prior_p=prob)
+            if children[action] is None:
+                children[action] = TreeNode(parent=self, prior_p=prob)
+                self.n_children += 1
+    
+    def child(self, action:int) -> 'TreeNode|None':
+        """
+        获取动作对应的子节点。
+        
+        Args:
+            action (int): 动作编号。
+        
+        Returns:
+            TreeNode|None: 子节点，不存在时返回None。
+        
+        """
+        if self.children is None or not 0 <= action < len(self.children):
+            return None
+        return self.children[action]
+    
+    def child_items(self) -> list[tuple[int, 'TreeNode']]:
+        """
+        获取全部子节点。
+        
+        Args:
+            无参数。
+        
+        Returns:
+            list[tuple[int, TreeNode]]: 按动作编号排列的(动作, 子节点)列表。
+        
+        """
+        if self.children is None:
+            return []
+        return [(action, child) for action, child in enumerate(self.children) if child is not None]
     
     def update(self, leaf_value:float) -> None:
         """
@@ -68,7 +134,7 @@ class TreeNode:
     
     def update_recursive(self, leaf_value:float) -> None:
         """
-        递归更新树节点的值
+        从当前节点沿父节点迭代回溯到根节点，更新路径上每个节点的值，每上升一层价值取反。
         
         Args:
             leaf_value (float): 需要更新的叶子节点的值
@@ -77,13 +143,16 @@ class TreeNode:
             None
         
         """
-        if self.parent:
-            self.parent.update_recursive(-leaf_value)
-        self.update(leaf_value)
+        node = self
+        while node is not None:
+            node.n_visits += 1
+            node.Q += 1.0 * (leaf_value - node.Q) / node.n_visits
+            leaf_value = -leaf_value
+            node = node.parent
     
     def get_score(self, c_puct:float) -> float:
         """
-        计算并返回当前节点的分数。
+        计算并返回当前节点的分数，与select中使用的得分一致。
         
         Args:
             c_puct (float): 用于计算 U 的常数，用于平衡探索和利用。
@@ -92,8 +161,12 @@ class TreeNode:
             float: 当前节点的分数，由 Q 值和 U 值相加得到。
         
         """
-        self.U = c_puct * self.P * np.sqrt(self.parent.n_visits) / (1 + self.n_visits)
-        return self.Q + self.U
+        parent = self.parent
+        if self.n_virtual or parent.n_virtual:
+            n = self.n_visits + self.n_virtual
+            q = (self.Q * self.n_visits - self.n_virtual) / n if n else 0.0
+            return q + c_puct * self.P * math.sqrt(parent.n_visits + parent.n_virtual) / (1 + n)
+        return self.Q + c_puct * self.P * math.sqrt(parent.n_visits) / (1 + self.n_visits)
     
     def is_leaf(self) -> bool:
         """
@@ -105,7 +178,7 @@ class TreeNode:
         Returns:
             bool: 若当前节点没有子节点，返回True；否则返回False。
         """
-        return self.children == {}
+        return self.children is None
     
     def is_root(self) -> bool:
         """
@@ -120,8 +193,111 @@ class TreeNode:
         """
         return self.parent is None
     
+@dataclass
+class SearchStats:
+    """
+    一次搜索的统计信息。
+    
+    Attributes:
+        playouts (int): 本次完成的模拟次数。
+        elapsed (float): 本次搜索耗时（秒）。
+        tree_size (int): 搜索结束时树中的节点数。
+        inherited_visits (int): 搜索开始前根节点从上一步继承的访问次数。
+        stop_reason (str): 停止原因，'playouts'（模拟次数用尽）、'time'（超时）、'nodes'（节点数达到上限）或'decided'（最佳动作已无法被超越）。
+        profile (SearchProfile|None): 分阶段耗时与计数，仅在开启profile时记录，否则为None。
+    """
+    playouts: int
+    elapsed: float
+    tree_size: int
+    inherited_visits: int
+    stop_reason: str
+    profile: 'SearchProfile|None' = None
+
+@dataclass
+class SearchProfile:
+    """
+    一次搜索的分阶段耗时（秒）与计数。批量搜索与树并行搜索不记录。
+    
+    Attributes:
+        copy_time (float): 复制游戏状态（undo模式下为撤销落子）的耗时。
+        select_time (float): 自根节点向下选择子节点并落子的耗时。
+        policy_time (float): 调用策略价值函数的耗时。
+        expand_time (float): 判断终局并扩展叶节点的耗时。
+        backup_time (float): 沿路径回传价值的耗时。
+        playouts (int): 记录的模拟次数。
+        policy_calls (int): 策略价值函数调用次数。
+        nodes_expanded (int): 被扩展的叶节点数。
+        children_created (int): 扩展时新建的子节点数。
+        terminal_leaves (int): 到达终局的模拟次数。
+        tt_hits (int): 置换表命中次数，仅TTMCTS记录。
+        max_depth (int): 最大模拟深度。
+        total_depth (int): 所有模拟的深度之和。
+    """
+    copy_time: float = 0.0
+    select_time: float = 0.0
+    policy_time: float = 0.0
+    expand_time: float = 0.0
+    backup_time: float = 0.0
+    playouts: int = 0
+    policy_calls: int = 0
+    nodes_expanded: int = 0
+    children_created: int = 0
+    terminal_leaves: int = 0
+    tt_hits: int = 0
+    max_depth: int = 0
+    total_depth: int = 0
+    
+    def add_playout(self, depth:int) -> None:
+        self.playouts += 1
+        self.total_depth += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+    
+    @property
+    def avg_depth(self) -> float:
+        return self.total_depth / self.playouts if self.playouts else 0.0
+    
+    @property
+    def avg_branching(self) -> float:
+        return self.children_created / self.nodes_expanded if self.nodes_expanded else 0.0
+    
+    def to_dict(self) -> dict[str, float]:
+        """
+        转换为便于导出到指标系统的字典，包含平均深度与平均分支数。
+        
+        Args:
+            无参数。
+        
+        Returns:
+            dict[str, float]: 字段名到数值的映射。
+        
+        """
+        data = asdict(self)
+        data['avg_depth'] = self.avg_depth
+        data['avg_branching'] = self.avg_branching
+        return data
+
+def terminal_value(state:Game, winner:int|None) -> float:
+    """
+    终局对当前行棋方的价值。
+    
+    Args:
+        state (Game): 已结束的游戏状态。
+        winner (int|None): 获胜者编号，和棋为None。
+    
+    Returns:
+        float: 和棋为0，行棋方获胜为1，否则为-1。
+    
+    """
+    if winner is None:
+        return 0.0
+    return 1.0 if winner == state.current_player_id else -1.0
+
 class MCTS:
-    def __init__(self, policy_value_fn:Callable[[Game], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000) -> None:
+    def __init__(self, policy_value_fn:Callable[[Game], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000, undo:bool=False,
+                 policy_value_batch_fn:Callable[[list[Game]], tuple[list[list[tuple[int, float]]], Any]]|None=None, batch_size:int=8,
+                 time_limit:float|None=None, max_nodes:int|None=None, early_stop:bool=False,
+                 profile:bool=False, hook:Callable[[SearchStats], None]|None=None) -> None:
         """
         初始化函数，用于创建MCTS树。
         
@@ -129,6 +305,16 @@ class MCTS:
             policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 策略价值函数，输入当前状态，输出每个动作的概率分布和当前状态的价值。
             c_puct (float, optional):UCT公式中的探索系数，用于平衡探索和利用。默认为1.0。
             n_playout (int, optional):每次模拟游戏进行的次数。默认为2000。
+            undo (bool, optional):为True时所有模拟在同一个游戏对象上落子并通过undo_move撤销，不再复制游戏状态。默认为False。
+            policy_value_batch_fn (Callable[[list[Game]], tuple[list[list[tuple[int, float]]], Any]]|None, optional):
+                批量策略价值函数，输入一批状态，输出每个状态的动作先验列表与价值序列。给定时使用批量搜索。默认为None。
+            batch_size (int, optional):批量搜索时每批收集的叶节点数。默认为8。
+            time_limit (float|None, optional):每步搜索的时间上限（秒），None表示不限时。默认为None。
+            max_nodes (int|None, optional):搜索树节点数上限，None表示不限。默认为None。
+            early_stop (bool, optional):为True时，一旦访问次数最多的根子节点在剩余预算内不可能被超越即停止搜索。默认为False。
+            profile (bool, optional):为True时改用带计时的模拟路径，在SearchStats.profile中记录分阶段耗时与计数。
+                关闭时不执行任何计时代码。默认为False。
+            hook (Callable[[SearchStats], None]|None, optional):每次get_move结束后以搜索统计调用的回调，可用于导出到指标系统。默认为None。
         
         Returns:
             None
@@ -137,50 +323,328 @@ class MCTS:
         self.c_puct = c_puct
         self.policy = policy_value_fn
         self.n_playout = n_playout
+        self.undo = undo
+        self.policy_batch = policy_value_batch_fn
+        self.batch_size = batch_size
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.early_stop = early_stop
+        self.profile = profile
+        self.hook = hook
+        self.inherited_visits = 0
+        self.n_nodes = 1
+        self.stats = None
     
-    def playout(self, state:Game) -> None:
+    def _descend(self, state:Game) -> tuple[TreeNode, int]:
         """
-        进行游戏的一步蒙特卡洛树搜索的模拟
+        自根节点按PUCT公式向下选择到叶节点，并在state上执行沿途的落子。
         
         Args:
-            state (Game): 当前游戏状态
+            state (Game): 当前游戏状态。
         
         Returns:
-            None
+            tuple[TreeNode, int]: 到达的叶节点与执行的落子数。
         
         """
         node = self.root
-        while True:
-            if node.is_leaf():
-                break
+        depth = 0
+        while not node.is_leaf():
             action, node = node.select(self.c_puct)
             state.do_move(action)
-        action_probs, leaf_value = self.policy(state)
+            depth += 1
+        return node, depth
+    
+    def _expand_leaf(self, node:TreeNode, state:Game, action_probs:list[tuple[int, float]], leaf_value:float) -> tuple[float, int]:
+        """
+        对局未结束时按先验概率展开叶节点，否则以终局结果替换网络估值。
+        
+        Args:
+            node (TreeNode): 叶节点。
+            state (Game): 叶节点对应的游戏状态。
+            action_probs (list[tuple[int, float]]): 策略价值函数给出的动作先验。
+            leaf_value (float): 策略价值函数给出的叶节点价值。
+        
+        Returns:
+            tuple[float, int]: 叶节点行棋方视角的价值，以及新建的子节点数（终局时为0）。
+        
+        """
         end, winner = state.game_end()
-        if not end:
-            node.expand(action_probs)
+        if end:
+            return terminal_value(state, winner), 0
+        node.expand(action_probs)
+        self.n_nodes += node.n_children
+        return leaf_value, node.n_children
+    
+    def _backup(self, node:TreeNode, value:float) -> None:
+        node.update_recursive(value)
+    
+    def playout(self, state:Game) -> int:
+        """
+        进行游戏的一步蒙特卡洛树搜索的模拟
+        
+        Args:
+            state (Game): 当前游戏状态
+        
+        Returns:
+            int: 本次模拟在state上执行的落子数，可用于undo_move撤销。
+        
+        """
+        node, depth = self._descend(state)
+        action_probs, leaf_value = self.policy(state)
+        leaf_value, _ = self._expand_leaf(node, state, action_probs, leaf_value)
+        self._backup(node, -leaf_value)
+        return depth
+    
+    def playout_profiled(self, state:Game, profile:SearchProfile) -> int:
+        """
+        与playout相同的一次模拟，各阶段调用相同的方法，额外把各阶段耗时与计数累加到profile。
+        
+        Args:
+            state (Game): 当前游戏状态
+            profile (SearchProfile): 累加统计的对象。
+        
+        Returns:
+            int: 本次模拟在state上执行的落子数，可用于undo_move撤销。
+        
+        """
+        clock = time.perf_counter
+        t0 = clock()
+        node, depth = self._descend(state)
+        t1 = clock()
+        action_probs, leaf_value = self.policy(state)
+        t2 = clock()
+        leaf_value, n_children = self._expand_leaf(node, state, action_probs, leaf_value)
+        t3 = clock()
+        self._backup(node, -leaf_value)
+        t4 = clock()
+        if n_children:
+            profile.nodes_expanded += 1
+            profile.children_created += n_children
         else:
-            if winner is None:
-                leaf_value = 0.0
+            profile.terminal_leaves += 1
+        profile.select_time += t1 - t0
+        profile.policy_time += t2 - t1
+        profile.expand_time += t3 - t2
+        profile.backup_time += t4 - t3
+        profile.policy_calls += 1
+        profile.add_playout(depth)
+        return depth
+    
+    def search(self, state:Game, time_limit:float|None=None, max_nodes:int|None=None) -> SearchStats:
+        """
+        从当前状态执行模拟，直到模拟次数用尽、超时、树节点数达到上限，
+        或（开启early_stop时）最佳根动作在剩余预算内已不可能被超越。
+        无论预算多紧，都至少模拟到根节点有被访问的子节点为止。state在返回时保持不变。
+        
+        Args:
+            state (Game): 游戏当前状态。
+            time_limit (float|None, optional): 本次搜索的时间上限（秒），默认使用构造时的设置。
+            max_nodes (int|None, optional): 搜索树节点数上限，默认使用构造时的设置。
+        
+        Returns:
+            SearchStats: 本次搜索的统计信息。
+        
+        """
+        time_limit = self.time_limit if time_limit is None else time_limit
+        max_nodes = self.max_nodes if max_nodes is None else max_nodes
+        self.inherited_visits = self.root_visits(state)
+        start = time.perf_counter()
+        deadline = None if time_limit is None else start + time_limit
+        profile = SearchProfile() if self.profile and self.policy_batch is None else None
+        playouts = 0
+        # 新的根节点需两次模拟才有被访问的子节点（第一次只展开根节点），在此之前不检查停止条件，
+        # 保证get_move总有可选的动作，第二次模拟会访问先验概率最高的子节点
+        min_playouts = 0 if self.inherited_visits > 1 else 2
+        while True:
+            if playouts >= min_playouts:
+                if playouts >= self.n_playout:
+                    reason = 'playouts'
+                    break
+                if max_nodes is not None and self.tree_size() >= max_nodes:
+                    reason = 'nodes'
+                    break
+                if deadline is not None or self.early_stop:
+                    now = time.perf_counter()
+                    if deadline is not None and now >= deadline:
+                        reason = 'time'
+                        break
+                    if self.early_stop:
+                        remaining = self.n_playout - playouts
+                        if deadline is not None:
+                            remaining = min(remaining, playouts / (now - start) * (deadline - now))
+                        if self._decided(state, remaining):
+                            reason = 'decided'
+                            break
+            if self.policy_batch is not None:
+                playouts += self.search_batched(state, max(1, min(self.batch_size, self.n_playout - playouts)))
+            elif profile is not None:
+                self._profiled_step(state, profile)
+                playouts += 1
+            elif self.undo:
+                for _ in range(self.playout(state)):
+                    state.undo_move()
+                playouts += 1
             else:
-                leaf_value = 1.0 if winner == state.current_player_id else -1.0
-        node.update_recursive(-leaf_value)
+                self.playout(copy.deepcopy(state))
+                playouts += 1
+        return SearchStats(playouts, time.perf_counter() - start, self.tree_size(), self.inherited_visits, reason, profile)
     
-    def get_move(self, state:Game) -> int:
+    def _profiled_step(self, state:Game, profile:SearchProfile) -> None:
         """
-        基于蒙特卡洛树搜索，获取最佳下棋动作。
+        带计时的单次模拟，包括复制状态或撤销落子，state在返回时保持不变。
         
         Args:
             state (Game): 游戏当前状态。
+            profile (SearchProfile): 累加统计的对象。
         
         Returns:
-            int: 最佳下棋动作编号。
+            None
         
         """
-        for _ in range(self.n_playout):
+        if self.undo:
+            depth = self.playout_profiled(state, profile)
+            start = time.perf_counter()
+            for _ in range(depth):
+                state.undo_move()
+            profile.copy_time += time.perf_counter() - start
+        else:
+            start = time.perf_counter()
             _state = copy.deepcopy(state)
-            self.playout(_state)
-        return max(self.root.children.items(), key=lambda act_node: act_node[1].n_visits)[0]
+            profile.copy_time += time.perf_counter() - start
+            self.playout_profiled(_state, profile)
+    
+    def _decided(self, state:Game, remaining:float) -> bool:
+        """
+        判断访问次数最多的根子节点能否在剩余模拟中被第二名超越。
+        
+        Args:
+            state (Game): 游戏当前状态。
+            remaining (float): 剩余可用的模拟次数估计。
+        
+        Returns:
+            bool: 若已不可能被超越则返回True。
+        
+        """
+        visits = sorted(self.root_child_visits(state).values(), reverse=True)
+        if len(visits) < 2:
+            return len(visits) == 1
+        return visits[0] - visits[1] > remaining
+    
+    def search_batched(self, state:Game, k:int) -> int:
+        """
+        批量搜索一批：沿树下行收集至多k个待评估叶节点，路径上施加虚拟失败，
+        然后一次调用批量策略价值函数，再逐个扩展并回传结果。
+        虚拟失败只在已展开的节点间改变选择，下行再次到达已在本批中的叶节点时提前结束本批，
+        同一叶节点不会被重复评估与扩展。
+        
+        Args:
+            state (Game): 游戏当前状态，返回时保持不变。
+            k (int): 本批最多的模拟次数。
+        
+        Returns:
+            int: 本批完成的模拟次数，至少为1。
+        
+        """
+        pending = []
+        pending_nodes = set()
+        done = 0
+        for _ in range(k):
+            _state = state if self.undo else copy.deepcopy(state)
+            node = self.root
+            node.n_virtual += 1
+            depth = 0
+            while not node.is_leaf():
+                action, node = node.select(self.c_puct)
+                node.n_virtual += 1
+                _state.do_move(action)
+                depth += 1
+            if node in pending_nodes:
+                self._remove_virtual(node)
+                if self.undo:
+                    for _ in range(depth):
+                        state.undo_move()
+                break
+            end, winner = _state.game_end()
+            if end:
+                self._remove_virtual(node)
+                node.update_recursive(-terminal_value(_state, winner))
+            else:
+                pending.append((node, copy.deepcopy(_state) if self.undo else _state))
+                pending_nodes.add(node)
+            done += 1
+            if self.undo:
+                for _ in range(depth):
+                    state.undo_move()
+        if pending:
+            priors, values = self.policy_batch([leaf_state for _, leaf_state in pending])
+            for (node, _), action_probs, leaf_value in zip(pending, priors, values):
+                self._remove_virtual(node)
+                node.expand(action_probs)
+                self.n_nodes += node.n_children
+                node.update_recursive(-float(leaf_value))
+        return done
+    
+    def _remove_virtual(self, node:TreeNode) -> None:
+        while node is not None:
+            node.n_virtual -= 1
+            node = node.parent
+    
+    def root_visits(self, state:Game) -> int:
+        """
+        获取根节点当前的访问次数，搜索开始前即为从上一步搜索继承的访问次数。
+        
+        Args:
+            state (Game): 游戏当前状态。
+        
+        Returns:
+            int: 根节点访问次数。
+        
+        """
+        return int(self.root.n_visits)
+    
+    def root_child_visits(self, state:Game) -> dict[int, float]:
+        """
+        获取根节点各子节点的访问次数。
+        
+        Args:
+            state (Game): 游戏当前状态。
+        
+        Returns:
+            dict[int, float]: 动作到访问次数的映射。
+        
+        """
+        return {action: node.n_visits for action, node in self.root.child_items()}
+    
+    def tree_size(self) -> int:
+        """
+        获取搜索树当前的节点数。
+        
+        Args:
+            无参数。
+        
+        Returns:
+            int: 节点数。
+        
+        """
+        return self.n_nodes
+    
+    def get_move(self, state:Game, time_limit:float|None=None, max_nodes:int|None=None) -> int:
+        """
+        基于蒙特卡洛树搜索，获取最佳下棋动作。搜索统计保存在self.stats中，并传给hook（若有）。
+        
+        Args:
+            state (Game): 游戏当前状态。
+            time_limit (float|None, optional): 本次搜索的时间上限（秒），默认使用构造时的设置。
+            max_nodes (int|None, optional): 搜索树节点数上限，默认使用构造时的设置。
+        
+        Returns:
+            int: 最佳下棋动作编号。
+        
+        """
+        self.stats = self.search(state, time_limit, max_nodes)
+        if self.hook is not None:
+            self.hook(self.stats)
+        return max(self.root_child_visits(state).items(), key=lambda act_n: act_n[1])[0]
     
     def update_with_move(self, last_move: int) -> None:
         """
@@ -193,9 +657,18 @@ class MCTS:
             None
         
         """
-        if last_move in self.root.children:
-            self.root = self.root.children[last_move]
+        # 只保留所选子节点的子树，旧根节点及其余兄弟子树失去引用后被回收
+        child = self.root.child(last_move)
+        if child is not None:
+            self.root = child
             self.root.parent = None
+            self.n_nodes = 0
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                self.n_nodes += 1
+                stack.extend(child for _, child in node.child_items())
         else:
             self.root = TreeNode(None, 1.0)
+            self.n_nodes = 1
 
@@ -0,0 +1,304 @@
+import numpy as np
+
+from features import N_PLANES, STATE_SHAPE, encode_batch, masked_priors
+from game import Game
+
+N_INPUTS = N_PLANES * 9
+N_ACTIONS = 9
+
+class PolicyValueNet:
+    def __init__(self, hidden: tuple[int, ...] = (128, 128), max_batch: int = 64, seed: int | None = None) -> None:
+        """
+        纯NumPy实现的策略价值网络：输入为features.encode_state编码的局面（含棋龄），
+        经若干层全连接+ReLU后分为策略头（9个落子的softmax）与价值头（tanh，行棋方视角）。
+
+        推理时只使用构造时预分配的缓冲区，编码、前向与softmax都原地写入，热路径上不分配NumPy数组；
+        训练时手工反向传播，并以Adam更新参数。只支持默认的3x3棋盘。
+
+        Args:
+            hidden (tuple[int, ...], optional): 各隐藏层的宽度。默认为(128, 128)。
+            max_batch (int, optional): 单次推理的最大局面数，超过时分块计算。默认为64。
+            seed (int | None, optional): 参数初始化的随机种子。默认为None。
+
+        Returns:
+            None
+
+        """
+        self.hidden = tuple(hidden)
+        self.max_batch = max_batch
+        rng = np.random.default_rng(seed)
+        sizes = (N_INPUTS,) + self.hidden
+        self.params = {}
+        for i in range(len(self.hidden)):
+            self.params[f'W{i}'] = self._he(rng, sizes[i], sizes[i + 1])
+            self.params[f'b{i}'] = np.zeros(sizes[i + 1], dtype=np.float32)
+        self.params['Wp'] = self._he(rng, sizes[-1], N_ACTIONS)
+        self.params['bp'] = np.zeros(N_ACTIONS, dtype=np.float32)
+        self.params['Wv'] = self._he(rng, sizes[-1], 1)
+        self.params['bv'] = np.zeros(1, dtype=np.float32)
+        self.step = 0
+        self._adam = None
+        self._alloc_buffers()
+
+    @staticmethod
+    def _he(rng: np.random.Generator, n_in: int, n_out: int) -> np.ndarray:
+        return (rng.standard_normal((n_in, n_out)) * np.sqrt(2.0 / n_in)).astype(np.float32)
+
+    def _alloc_buffers(self) -> None:
+        # 推理缓冲区，_x与_planes共享内存，分别为展平与按平面的视图
+        self._planes = np.zeros((self.max_batch,) + STATE_SHAPE, dtype=np.float32)
+        self._x = self._planes.reshape(self.max_batch, N_INPUTS)
+        self._h = [np.empty((self.max_batch, width), dtype=np.float32) for width in self.hidden]
+        self._logits = np.empty((self.max_batch, N_ACTIONS), dtype=np.float32)
+        self._illegal = np.empty((self.max_batch, N_ACTIONS), dtype=bool)
+        self._col = np.empty((self.max_batch, 1), dtype=np.float32)
+        self._value = np.empty((self.max_batch, 1), dtype=np.float32)
+
+    def __getstate__(self) -> dict:
+        # 缓冲区不随对象传递，在接收方重新分配
+        state = self.__dict__.copy()
+        for name in ('_planes', '_x', '_h', '_logits', '_illegal', '_col', '_value'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._alloc_buffers()
+
+    def _infer(self, states: list[Game]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        对不超过max_batch个局面做一次前向计算，结果写入内部缓冲区。
+
+        Args:
+            states (list[Game]): 游戏状态列表。
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 形状为(n, 9)的落子概率（非法落子为0）与形状为(n, 1)的价值，均为缓冲区视图，下次推理时被覆盖。
+
+        """
+        n = len(states)
+        params = self.params
+        encode_batch(states, out=self._planes)
+        x = self._x[:n]
+        for i, h in enumerate(self._h):
+            h = h[:n]
+            np.dot(x, params[f'W{i}'], out=h)
+            np.add(h, params[f'b{i}'], out=h)
+            np.maximum(h, 0.0, out=h)
+            x = h
+        logits = self._logits[:n]
+        np.dot(x, params['Wp'], out=logits)
+        np.add(logits, params['bp'], out=logits)
+        illegal = self._illegal[:n]
+        illegal.fill(True)
+        for i, state in enumerate(states):
+            illegal[i, state.availables] = False
+        np.copyto(logits, -np.inf, where=illegal)
+        col = self._col[:n]
+        np.max(logits, axis=1, keepdims=True, out=col)
+        np.subtract(logits, col, out=logits)
+        np.exp(logits, out=logits)
+        np.sum(logits, axis=1, keepdims=True, out=col)
+        np.divide(logits, col, out=logits)
+        value = self._value[:n]
+        np.dot(x, params['Wv'], out=value)
+        np.add(value, params['bv'], out=value)
+        np.tanh(value, out=value)
+        return logits, value
+
+    def policy_value_batch(self, states: list[Game]) -> tuple[list[list[tuple[int, float]]], list[float]]:
+        """
+        批量评估局面，可作为MCTS的policy_value_batch_fn。
+
+        Args:
+            states (list[Game]): 游戏状态列表。
+
+        Returns:
+            tuple[list[list[tuple[int, float]]], list[float]]: 每个局面的(动作, 先验概率)列表，以及行棋方视角的价值。
+
+        """
+        priors, values = [], []
+        for start in range(0, len(states), self.max_batch):
+            chunk = states[start:start + self.max_batch]
+            probs, value = self._infer(chunk)
+            priors += masked_priors(probs, chunk)
+            values += value[:, 0].tolist()
+        return priors, values
+
+    def policy_value(self, state: Game) -> tuple[list[tuple[int, float]], float]:
+        """
+        评估单个局面，可作为MCTS的policy_value_fn。
+
+        Args:
+            state (Game): 游戏状态。
+
+        Returns:
+            tuple[list[tuple[int, float]], float]: 动作先验列表与行棋方视角的价值。
+
+        """
+        probs, value = self._infer([state])
+        return masked_priors(probs, [state])[0], float(value[0, 0])
+
+    def __call__(self, state: Game) -> tuple[list[tuple[int, float]], float]:
+        return self.policy_value(state)
+
+    def _forward(self, x: np.ndarray) -> tuple[list[np.ndarray], np.ndarray, np.ndarray]:
+        activations = [x]
+        for i in range(len(self.hidden)):
+            x = np.maximum(x @ self.params[f'W{i}'] + self.params[f'b{i}'], 0.0)
+            activations.append(x)
+        logits = x @ self.params['Wp'] + self.params['bp']
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        value = np.tanh(x @ self.params['Wv'] + self.params['bv'])[:, 0]
+        return activations, probs, value
+
+    def loss(self, x: np.ndarray, target_pi: np.ndarray, target_z: np.ndarray, weight_decay: float = 1e-4) -> dict[str, float]:
+        """
+        计算一批样本上的损失，不更新参数。
+
+        Args:
+            x (np.ndarray): 形状为(B, *STATE_SHAPE)或(B, 63)的编码局面。
+            target_pi (np.ndarray): 形状为(B, 9)的目标落子分布（MCTS根节点访问比例）。
+            target_z (np.ndarray): 形状为(B,)的对局结果，行棋方视角。
+            weight_decay (float, optional): 权重的L2正则系数。默认为1e-4。
+
+        Returns:
+            dict[str, float]: 价值损失、策略交叉熵、正则项与总损失。
+
+        """
+        _, probs, value = self._forward(np.asarray(x, dtype=np.float32).reshape(len(x), N_INPUTS))
+        return self._loss_stats(probs, value, target_pi, target_z, weight_decay)
+
+    def sample_losses(self, x: np.ndarray, target_pi: np.ndarray, target_z: np.ndarray) -> np.ndarray:
+        """
+        计算每个样本的价值损失与策略交叉熵之和，可作为优先经验回放的优先级。
+
+        Args:
+            x (np.ndarray): 形状为(B, *STATE_SHAPE)或(B, 63)的编码局面。
+            target_pi (np.ndarray): 形状为(B, 9)的目标落子分布。
+            target_z (np.ndarray): 形状为(B,)的对局结果，行棋方视角。
+
+        Returns:
+            np.ndarray: 形状为(B,)的逐样本损失。
+
+        """
+        _, probs, value = self._forward(np.asarray(x, dtype=np.float32).reshape(len(x), N_INPUTS))
+        return (target_z - value) ** 2 - np.sum(target_pi * np.log(probs + 1e-12), axis=1)
+
+    def _loss_stats(self, probs: np.ndarray, value: np.ndarray, target_pi: np.ndarray, target_z: np.ndarray,
+                    weight_decay: float, weights: np.ndarray | None = None) -> dict[str, float]:
+        value_loss = float(np.average((target_z - value) ** 2, weights=weights))
+        policy_loss = float(-np.average(np.sum(target_pi * np.log(probs + 1e-12), axis=1), weights=weights))
+        l2 = weight_decay * float(sum(np.sum(p * p) for name, p in self.params.items() if name.startswith('W')))
+        return {'value_loss': value_loss, 'policy_loss': policy_loss, 'l2': l2, 'loss': value_loss + policy_loss + l2}
+
+    def gradients(self, x: np.ndarray, target_pi: np.ndarray, target_z: np.ndarray, weight_decay: float = 1e-4,
+                  weights: np.ndarray | None = None) -> tuple[dict[str, np.ndarray], dict[str, float]]:
+        """
+        手工反向传播，计算总损失（价值均方误差 + 策略交叉熵 + L2正则）对全部参数的梯度，前向结果同时用于计算损失。
+
+        Args:
+            x (np.ndarray): 形状为(B, *STATE_SHAPE)或(B, 63)的编码局面。
+            target_pi (np.ndarray): 形状为(B, 9)的目标落子分布。
+            target_z (np.ndarray): 形状为(B,)的对局结果，行棋方视角。
+            weight_decay (float, optional): 权重的L2正则系数。默认为1e-4。
+            weights (np.ndarray | None, optional): 形状为(B,)的样本权重（如优先经验回放的重要性权重），损失按权重加权平均。默认为None。
+
+        Returns:
+            tuple[dict[str, np.ndarray], dict[str, float]]: 参数名到梯度的映射，以及更新前的损失（见loss）。
+
+        """
+        n = len(x)
+        activations, probs, value = self._forward(np.asarray(x, dtype=np.float32).reshape(n, N_INPUTS))
+        top = activations[-1]
+        grads = {}
+        scale = np.full(n, 1.0 / n, dtype=np.float32) if weights is None else weights / np.sum(weights)
+        d_logits = (probs - target_pi) * scale[:, None]
+        d_value = (2.0 * scale * (value - target_z) * (1.0 - value * value))[:, None]
+        grads['Wp'] = top.T @ d_logits
+        grads['bp'] = d_logits.sum(axis=0)
+        grads['Wv'] = top.T @ d_value
+        grads['bv'] = d_value.sum(axis=0)
+        d_h = d_logits @ self.params['Wp'].T + d_value @ self.params['Wv'].T
+        for i in reversed(range(len(self.hidden))):
+            d_h *= activations[i + 1] > 0
+            grads[f'W{i}'] = activations[i].T @ d_h
+            grads[f'b{i}'] = d_h.sum(axis=0)
+            if i:
+                d_h = d_h @ self.params[f'W{i}'].T
+        for name, p in self.params.items():
+            if name.startswith('W'):
+                grads[name] += 2.0 * weight_decay * p
+        return grads, self._loss_stats(probs, value, target_pi, target_z, weight_decay, weights)
+
+    def train_step(self, x: np.ndarray, target_pi: np.ndarray, target_z: np.ndarray, lr: float = 1e-3, weight_decay: float = 1e-4,
+                   betas: tuple[float, float] = (0.9, 0.999), eps: float = 1e-8, weights: np.ndarray | None = None) -> dict[str, float]:
+        """
+        在一个小批量上做一步Adam更新。
+
+        Args:
+            x (np.ndarray): 形状为(B, *STATE_SHAPE)或(B, 63)的编码局面。
+            target_pi (np.ndarray): 形状为(B, 9)的目标落子分布。
+            target_z (np.ndarray): 形状为(B,)的对局结果，行棋方视角。
+            lr (float, optional): 学习率。默认为1e-3。
+            weight_decay (float, optional): 权重的L2正则系数。默认为1e-4。
+            betas (tuple[float, float], optional): Adam的一阶与二阶矩衰减系数。默认为(0.9, 0.999)。
+            eps (float, optional): Adam的数值稳定项。默认为1e-8。
+            weights (np.ndarray | None, optional): 样本权重，见gradients。默认为None。
+
+        Returns:
+            dict[str, float]: 更新前在该批量上的损失，见loss。
+
+        """
+        grads, stats = self.gradients(x, target_pi, target_z, weight_decay, weights)
+        if self._adam is None:
+            self._adam = {name: (np.zeros_like(p), np.zeros_like(p)) for name, p in self.params.items()}
+        self.step += 1
+        beta1, beta2 = betas
+        scale = lr * np.sqrt(1.0 - beta2 ** self.step) / (1.0 - beta1 ** self.step)
+        for name, p in self.params.items():
+            g = grads[name].astype(np.float32, copy=False)
+            m, v = self._adam[name]
+            m *= beta1
+            m += (1.0 - beta1) * g
+            v *= beta2
+            v += (1.0 - beta2) * g * g
+            p -= scale * m / (np.sqrt(v) + eps)
+        return stats
+
+    def save(self, path: str) -> None:
+        """
+        保存参数到npz检查点，Adam状态不保存。
+
+        Args:
+            path (str): 检查点路径。
+
+        Returns:
+            None
+
+        """
+        np.savez(path, hidden=np.array(self.hidden), step=np.array(self.step), **self.params)
+
+    @classmethod
+    def load(cls, path: str, max_batch: int = 64) -> 'PolicyValueNet':
+        """
+        从npz检查点加载网络。
+
+        Args:
+            path (str): 检查点路径。
+            max_batch (int, optional): 单次推理的最大局面数。默认为64。
+
+        Returns:
+            PolicyValueNet: 加载后的网络。
+
+        """
+        with np.load(path) as data:
+            net = cls(tuple(int(w) for w in data['hidden']), max_batch)
+            for name in net.params:
+                if data[name].shape != net.params[name].shape:
+                    raise ValueError(f'检查点参数形状不匹配：{name}')
+                net.params[name] = data[name].astype(np.float32)
+            net.step = int(data['step'])
+        return net
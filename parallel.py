@@ -0,0 +1,237 @@
+import copy
+import os
+import random
+import sys
+import threading
+import time
+from multiprocessing import Pool
+from typing import Callable
+
+import numpy as np
+
+from bitgame import BitGame
+from game import Game
+from mcts import MCTS, SearchStats, terminal_value
+
+_worker_mcts = None
+
+def seed_worker() -> None:
+    """
+    以进程号与当前时间重新设置random与NumPy的随机种子，供各进程池的初始化函数调用，
+    避免fork出的工作进程继承相同的随机状态。
+
+    Args:
+        无参数。
+
+    Returns:
+        None
+
+    """
+    seed = (os.getpid() * 1000003 + time.time_ns()) & 0xFFFFFFFF
+    random.seed(seed)
+    np.random.seed(seed)
+
+def _init_worker(policy_value_fn:Callable, c_puct:float, n_playout:int, undo:bool) -> None:
+    """
+    进程池初始化函数，每个工作进程只接收一次策略函数并重新设置随机种子，避免各进程搜索完全相同。
+
+    Args:
+        policy_value_fn (Callable): 策略价值函数，需可被pickle（模块级函数）。
+        c_puct (float): UCT公式中的探索系数。
+        n_playout (int): 每个工作进程每步的模拟次数。
+        undo (bool): 是否使用undo_move原地搜索。
+
+    Returns:
+        None
+
+    """
+    global _worker_mcts
+    seed_worker()
+    _worker_mcts = MCTS(policy_value_fn, c_puct, n_playout, undo)
+
+def _root_search(state:Game) -> dict[int, float]:
+    """
+    在工作进程中从空树开始独立搜索。
+
+    Args:
+        state (Game): 游戏当前状态。
+
+    Returns:
+        dict[int, float]: 根节点各动作的访问次数。
+
+    """
+    _worker_mcts.update_with_move(-1)
+    _worker_mcts.search(state)
+    return _worker_mcts.root_child_visits(state)
+
+class RootParallelMCTS:
+    def __init__(self, policy_value_fn:Callable[[Game], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000, n_workers:int|None=None, undo:bool=False) -> None:
+        """
+        根并行蒙特卡洛树搜索：多个进程各自独立搜索，再合并根节点的访问次数。接口与MCTS一致。
+
+        Args:
+            policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 策略价值函数，需可被pickle（模块级函数）。
+            c_puct (float, optional):UCT公式中的探索系数。默认为1.0。
+            n_playout (int, optional):每步总模拟次数，平均分配给各进程。默认为2000。
+            n_workers (int|None, optional):工作进程数，默认为CPU核数。
+            undo (bool, optional):工作进程是否使用undo_move原地搜索。默认为False。
+
+        Returns:
+            None
+        """
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.n_playout = n_playout
+        per_worker = max(1, n_playout // self.n_workers)
+        self.pool = Pool(self.n_workers, initializer=_init_worker, initargs=(policy_value_fn, c_puct, per_worker, undo))
+        self.visits = {}
+
+    def get_move(self, state:Game) -> int:
+        """
+        并行搜索并按合并后的访问次数选择最佳下棋动作。
+
+        Args:
+            state (Game): 游戏当前状态。
+
+        Returns:
+            int: 最佳下棋动作编号。
+
+        """
+        self.visits = {}
+        for visits in self.pool.map(_root_search, [state] * self.n_workers):
+            for action, n in visits.items():
+                self.visits[action] = self.visits.get(action, 0.0) + n
+        return max(self.visits.items(), key=lambda act_n: act_n[1])[0]
+
+    def update_with_move(self, last_move:int) -> None:
+        """
+        各进程每步都从空树开始搜索，无需维护搜索树。
+
+        Args:
+            last_move (int): 上一步的移动id
+
+        Returns:
+            None
+
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        关闭进程池。
+
+        Args:
+            无参数。
+
+        Returns:
+            None
+
+        """
+        self.pool.close()
+        self.pool.join()
+
+
+class TreeParallelMCTS(MCTS):
+    def __init__(self, policy_value_fn:Callable[[Game], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000, n_workers:int|None=None) -> None:
+        """
+        树并行蒙特卡洛树搜索：多个线程共享同一棵树，选择与回传在锁内进行并施加虚拟失败，
+        策略价值函数在锁外调用。只有释放GIL的评估函数（如NumPy批量运算）才能获得加速。
+
+        Args:
+            policy_value_fn (Callable[[Game], tuple[list[tuple[int, float]], float]]): 策略价值函数，需线程安全。
+            c_puct (float, optional):UCT公式中的探索系数。默认为1.0。
+            n_playout (int, optional):每步总模拟次数。默认为2000。
+            n_workers (int|None, optional):线程数，默认为CPU核数。
+
+        Returns:
+            None
+        """
+        super().__init__(policy_value_fn, c_puct, n_playout)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.lock = threading.Lock()
+
+    def _worker(self, state:Game, n_playout:int) -> None:
+        for _ in range(n_playout):
+            _state = copy.deepcopy(state)
+            with self.lock:
+                node = self.root
+                node.n_virtual += 1
+                while not node.is_leaf():
+                    action, node = node.select(self.c_puct)
+                    node.n_virtual += 1
+                    _state.do_move(action)
+            end, winner = _state.game_end()
+            if end:
+                action_probs = None
+                leaf_value = terminal_value(_state, winner)
+            else:
+                action_probs, leaf_value = self.policy(_state)
+            with self.lock:
+                self._remove_virtual(node)
+                if action_probs is not None and node.is_leaf():
+                    node.expand(action_probs)
+                    self.n_nodes += node.n_children
+                node.update_recursive(-leaf_value)
+
+    def search(self, state:Game, time_limit:float|None=None, max_nodes:int|None=None) -> SearchStats:
+        """
+        启动n_workers个线程共同完成n_playout次模拟。树并行模式只支持模拟次数预算。
+
+        Args:
+            state (Game): 游戏当前状态。
+            time_limit (float|None, optional): 不支持，仅为与MCTS接口保持一致。
+            max_nodes (int|None, optional): 不支持，仅为与MCTS接口保持一致。
+
+        Returns:
+            SearchStats: 本次搜索的统计信息。
+
+        """
+        self.inherited_visits = self.root_visits(state)
+        start = time.perf_counter()
+        share, extra = divmod(self.n_playout, self.n_workers)
+        threads = [threading.Thread(target=self._worker, args=(state, share + (i < extra)))
+                   for i in range(self.n_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return SearchStats(self.n_playout, time.perf_counter() - start, self.tree_size(), self.inherited_visits, 'playouts')
+
+
+def benchmark(policy_value_fn:Callable, n_playout:int=4000, max_workers:int|None=None) -> list[tuple[str, int, float]]:
+    """
+    测量根并行与树并行在不同工作数下每秒完成的模拟次数。
+
+    Args:
+        policy_value_fn (Callable): 策略价值函数，需可被pickle。
+        n_playout (int, optional): 每次测量的总模拟次数。默认为4000。
+        max_workers (int|None, optional): 最大工作数，默认为CPU核数。
+
+    Returns:
+        list[tuple[str, int, float]]: (模式, 工作数, 每秒模拟次数)列表。
+
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {2 ** i for i in range(max_workers.bit_length()) if 2 ** i <= max_workers})
+    results = []
+    for n in counts:
+        state = BitGame()
+        state.init_board(1)
+        mcts = RootParallelMCTS(policy_value_fn, 1.0, n_playout, n)
+        mcts.get_move(state)  # 预热进程池
+        start = time.perf_counter()
+        mcts.get_move(state)
+        results.append(('root', n, n_playout / (time.perf_counter() - start)))
+        mcts.close()
+
+        mcts = TreeParallelMCTS(policy_value_fn, 1.0, n_playout, n)
+        start = time.perf_counter()
+        mcts.get_move(state)
+        results.append(('tree', n, n_playout / (time.perf_counter() - start)))
+    return results
+
+
+if __name__ == '__main__':
+    from play import policy_value_fn
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    for mode, n, rate in benchmark(policy_value_fn, max_workers=max_workers):
+        print(f'{mode:>4} 工作数={n:<3} 每秒模拟次数={rate:.0f}')
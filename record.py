@@ -0,0 +1,373 @@
+import argparse
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from bitgame import BitGame
+from game import Game, board_geometry, list2str
+
+# 对局记录文件：文件头（魔数、版本、列数、行数、连子数、每方棋子数）之后依次为各局记录，
+# 每局先写入先手玩家(uint8)、获胜者(uint8，和棋为0)、步数(uint16)，再写入每步一个字节的落子位置ID。
+RECORD_MAGIC = b'VTGR'
+RECORD_VERSION = 1
+FILE_HEADER = struct.Struct('<4sBBBBB3x')
+GAME_HEADER = struct.Struct('<BBH')
+MAX_LENGTH = 0xFFFF
+
+# 索引文件与记录文件同名加.idx后缀：魔数之后为每局记录起始偏移(uint64)，可内存映射后随机访问第n局
+INDEX_MAGIC = b'VTGI\x01\x00\x00\x00'
+
+def index_path(path: str) -> str:
+    return path + '.idx'
+
+@dataclass
+class GameRecord:
+    """
+    一局对局记录。
+
+    Attributes:
+        start_player (int): 先手玩家编号。
+        winner (int): 获胜者编号，和棋或达到步数上限为0。
+        moves (bytes): 落子序列，每步一个字节的落子位置ID。
+    """
+    start_player: int
+    winner: int
+    moves: bytes
+
+def _read_header(f, path: str) -> tuple[int, int, int, int]:
+    data = f.read(FILE_HEADER.size)
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f'{path} 不是对局记录文件')
+    magic, version, width, height, n_in_row, n_stones = FILE_HEADER.unpack(data)
+    if magic != RECORD_MAGIC:
+        raise ValueError(f'{path} 不是对局记录文件')
+    if version != RECORD_VERSION:
+        raise ValueError(f'不支持的对局记录版本：{version}')
+    return width, height, n_in_row, n_stones
+
+def _scan(f, path: str) -> Iterator[tuple[int, GameRecord]]:
+    # 从当前位置起逐局读取，同时给出每局的起始偏移
+    offset = f.tell()
+    while True:
+        header = f.read(GAME_HEADER.size)
+        if not header:
+            return
+        if len(header) < GAME_HEADER.size:
+            raise ValueError(f'{path} 在偏移{offset}处截断')
+        start_player, winner, length = GAME_HEADER.unpack(header)
+        moves = f.read(length)
+        if len(moves) < length:
+            raise ValueError(f'{path} 在偏移{offset}处截断')
+        yield offset, GameRecord(start_player, winner, moves)
+        offset += GAME_HEADER.size + length
+
+class RecordWriter:
+    def __init__(self, path: str, width: int = 3, height: int = 3, n_in_row: int = 3, n_stones: int = 3,
+                 append: bool = False, buffer_size: int = 1 << 20) -> None:
+        """
+        流式写入对局记录并同步写入索引文件，写入端只保留固定大小的文件缓冲区。
+
+        Args:
+            path (str): 记录文件路径，索引写入 path + '.idx'。
+            width (int, optional): 棋盘列数。默认为3。
+            height (int, optional): 棋盘行数。默认为3。
+            n_in_row (int, optional): 获胜所需的连子数。默认为3。
+            n_stones (int, optional): 每方最多保留的棋子数。默认为3。
+            append (bool, optional): 文件已存在时是否在末尾追加（棋盘参数需一致），否则覆盖。默认为False。
+            buffer_size (int, optional): 文件缓冲区字节数。默认为1 MiB。
+
+        Returns:
+            None
+
+        """
+        board_geometry(width, height, n_in_row, n_stones)
+        if width * height > 256:
+            raise ValueError(f'落子位置ID需在一个字节内，棋盘最多256格，实际为{width * height}格')
+        self.path = path
+        self.geometry = (width, height, n_in_row, n_stones)
+        if append and os.path.exists(path):
+            with open(path, 'rb') as f:
+                geometry = _read_header(f, path)
+            if geometry != self.geometry:
+                raise ValueError(f'{path} 的棋盘参数为{geometry}，与指定的{self.geometry}不一致')
+            self.n_games = len(load_index(path))
+            self.file = open(path, 'ab', buffering=buffer_size)
+            self.index = open(index_path(path), 'ab', buffering=buffer_size)
+        else:
+            self.n_games = 0
+            self.file = open(path, 'wb', buffering=buffer_size)
+            self.file.write(FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, *self.geometry))
+            self.index = open(index_path(path), 'wb', buffering=buffer_size)
+            self.index.write(INDEX_MAGIC)
+        self.offset = self.file.tell()
+
+    def write(self, start_player: int, winner: int, moves: bytes) -> None:
+        """
+        追加一局记录。
+
+        Args:
+            start_player (int): 先手玩家编号。
+            winner (int): 获胜者编号，和棋为0。
+            moves (bytes): 落子序列，每步一个字节。
+
+        Returns:
+            None
+
+        """
+        length = len(moves)
+        if length > MAX_LENGTH:
+            raise ValueError(f'单局最多记录{MAX_LENGTH}步，实际为{length}步')
+        self.file.write(GAME_HEADER.pack(start_player, winner, length))
+        self.file.write(moves)
+        self.index.write(self.offset.to_bytes(8, 'little'))
+        self.offset += GAME_HEADER.size + length
+        self.n_games += 1
+
+    def write_game(self, game: Game | BitGame, moves: list[int] | None = None) -> None:
+        """
+        追加一局已结束（或中止）的对局，先手与获胜者取自对局对象。
+        game.Game的落子序列可从落子历史恢复；BitGame的历史只保存棋子队列，需通过moves给出落子序列。
+
+        Args:
+            game (Game | BitGame): 对局，落子从init_board开始。
+            moves (list[int] | None, optional): 落子序列，长度需与对局步数一致。game为BitGame时必须给出。默认为None。
+
+        Returns:
+            None
+
+        """
+        if isinstance(game, BitGame):
+            geometry = (3, 3, 3, 3)
+            if moves is None:
+                raise ValueError('BitGame的历史不含落子位置，请通过moves给出落子序列，或直接调用write')
+        else:
+            geometry = (game.width, game.height, game.n_in_row, game.n_stones)
+            if moves is None:
+                moves = [move for move, *_ in game.history]
+        if geometry != self.geometry:
+            raise ValueError(f'对局的棋盘参数为{geometry}，与记录文件的{self.geometry}不一致')
+        n_moves = len(game.history)
+        if len(moves) != n_moves:
+            raise ValueError(f'落子序列有{len(moves)}步，对局实际为{n_moves}步')
+        start_player = game.current_player if n_moves % 2 == 0 else 3 - game.current_player
+        self.write(start_player, game.winner or 0, bytes(moves))
+
+    def flush(self) -> None:
+        # 先写记录再写索引，索引中的偏移总指向已写入的数据
+        self.file.flush()
+        self.index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def read_records(path: str, start: int = 0, buffer_size: int = 1 << 20) -> Iterator[GameRecord]:
+    """
+    流式读取对局记录，内存占用只与文件缓冲区有关。
+
+    Args:
+        path (str): 记录文件路径。
+        start (int, optional): 从第start局开始读取，大于0时借助索引定位。默认为0。
+        buffer_size (int, optional): 文件缓冲区字节数。默认为1 MiB。
+
+    Yields:
+        GameRecord: 每局记录。
+
+    """
+    with open(path, 'rb', buffering=buffer_size) as f:
+        _read_header(f, path)
+        if start:
+            offsets = load_index(path)
+            if start >= len(offsets):
+                return
+            f.seek(int(offsets[start]))
+        for _, record in _scan(f, path):
+            yield record
+
+def build_index(path: str) -> np.ndarray:
+    """
+    扫描记录文件重建索引文件，用于索引缺失或与记录文件不一致（如写入中断）时。
+
+    Args:
+        path (str): 记录文件路径。
+
+    Returns:
+        np.ndarray: 每局记录的起始偏移。
+
+    """
+    with open(path, 'rb', buffering=1 << 20) as f, open(index_path(path), 'wb', buffering=1 << 20) as index:
+        _read_header(f, path)
+        index.write(INDEX_MAGIC)
+        for offset, _ in _scan(f, path):
+            index.write(offset.to_bytes(8, 'little'))
+    return load_index(path, rebuild=False)
+
+def load_index(path: str, rebuild: bool = True) -> np.ndarray:
+    """
+    以内存映射方式打开索引，只在访问时读取用到的偏移。
+
+    Args:
+        path (str): 记录文件路径。
+        rebuild (bool, optional): 索引缺失或与记录文件长度不一致时是否重建。默认为True。
+
+    Returns:
+        np.ndarray: 每局记录的起始偏移（uint64）。
+
+    """
+    ipath = index_path(path)
+    if os.path.exists(ipath) and os.path.getsize(ipath) >= len(INDEX_MAGIC):
+        with open(ipath, 'rb') as f:
+            valid = f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+        n_games = (os.path.getsize(ipath) - len(INDEX_MAGIC)) // 8
+        if valid and n_games == 0:
+            offsets = np.zeros(0, dtype='<u8')
+            end = FILE_HEADER.size
+        elif valid:
+            offsets = np.memmap(ipath, dtype='<u8', mode='r', offset=len(INDEX_MAGIC), shape=(n_games,))
+            # 最后一局的结尾应恰为记录文件末尾
+            with open(path, 'rb') as f:
+                f.seek(int(offsets[-1]))
+                header = f.read(GAME_HEADER.size)
+            end = int(offsets[-1]) + GAME_HEADER.size + GAME_HEADER.unpack(header)[2] if len(header) == GAME_HEADER.size else -1
+        if valid and end == os.path.getsize(path):
+            return offsets
+    if not rebuild:
+        raise ValueError(f'{ipath} 与记录文件不一致')
+    return build_index(path)
+
+class RecordFile:
+    def __init__(self, path: str) -> None:
+        """
+        借助索引随机访问对局记录，records[n]只读取第n局。
+
+        Args:
+            path (str): 记录文件路径。
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        self.file = open(path, 'rb')
+        self.width, self.height, self.n_in_row, self.n_stones = _read_header(self.file, path)
+        self.offsets = load_index(path)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, n: int) -> GameRecord:
+        if n < 0:
+            n += len(self.offsets)
+        if not 0 <= n < len(self.offsets):
+            raise IndexError(f'对局编号{n}超出范围')
+        self.file.seek(int(self.offsets[n]))
+        start_player, winner, length = GAME_HEADER.unpack(self.file.read(GAME_HEADER.size))
+        return GameRecord(start_player, winner, self.file.read(length))
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        return read_records(self.path)
+
+    def new_game(self) -> Game:
+        return Game(self.width, self.height, self.n_in_row, self.n_stones)
+
+    def replay(self, n: int) -> Iterator[Game]:
+        return replay(self[n], self.new_game())
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> 'RecordFile':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def replay(record: GameRecord, game: Game | None = None) -> Iterator[Game]:
+    """
+    逐步重现一局对局：先给出开局局面，之后每落一子给出一次局面。
+    所有局面为同一个原地更新的Game对象，需要保留时请调用copy；
+    刚消失的棋子见game.history[-1][1]，下一步将消失的棋子见game.disappear。
+
+    Args:
+        record (GameRecord): 对局记录。
+        game (Game | None, optional): 用于重现的对局对象，其棋盘参数需与记录一致，默认为新建的3x3对局。
+
+    Yields:
+        Game: 每步之后的局面。
+
+    """
+    if game is None:
+        game = Game()
+    game.init_board(record.start_player)
+    yield game
+    for move in record.moves:
+        if game.winner is not None or game.tie:
+            raise ValueError('对局已结束，记录中仍有落子')
+        game.do_move(move)
+        yield game
+    if (game.winner or 0) != record.winner:
+        raise ValueError(f'重现的获胜者为{game.winner or 0}，与记录的{record.winner}不一致')
+
+def convert_results(results_path: str, out: str) -> int:
+    """
+    将selfplay.py的3x3对局结果文件转换为对局记录文件。
+
+    Args:
+        results_path (str): selfplay.py输出的结果文件。
+        out (str): 输出的记录文件路径。
+
+    Returns:
+        int: 转换的对局数。
+
+    """
+    from selfplay import read_results
+
+    with RecordWriter(out) as writer:
+        for group in read_results(results_path):
+            ends = np.cumsum(group['length'], dtype=np.int64)
+            moves = group['moves'].tobytes()
+            for winner, start_player, end, length in zip(group['winner'].tolist(), group['start'].tolist(), ends.tolist(), group['length'].tolist()):
+                writer.write(start_player, winner, moves[end - length:end])
+        return writer.n_games
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对局记录统计与重现')
+    parser.add_argument('path', help='对局记录文件')
+    parser.add_argument('-g', '--game', type=int, default=None, help='逐步重现第n局')
+    parser.add_argument('--from-results', default=None, help='先将selfplay.py的结果文件转换为path')
+    args = parser.parse_args()
+    if args.from_results:
+        print(f'已转换{convert_results(args.from_results, args.path)}局')
+    if args.game is not None:
+        with RecordFile(args.path) as records:
+            record = records[args.game]
+            for ply, game in enumerate(records.replay(args.game)):
+                if ply:
+                    move, vanished = game.history[-1][:2]
+                    print(f'第{ply}步 玩家{3 - game.current_player} 落子{game.move_id2move_actions[move]}' + (f' 消失{vanished}' if vanished else ''))
+                for row in list2str(game.board):
+                    print('|'.join(f' {cell} ' for cell in row))
+            print(f'获胜者：{record.winner}' if record.winner else '和棋')
+    else:
+        start = time.perf_counter()
+        counts = {0: 0, 1: 0, 2: 0}
+        n_moves = 0
+        for record in read_records(args.path):
+            counts[record.winner] += 1
+            n_moves += len(record.moves)
+        elapsed = time.perf_counter() - start
+        n_games = sum(counts.values())
+        print(f'{n_games}局 玩家1胜：{counts[1]} 玩家2胜：{counts[2]} 和棋：{counts[0]} 平均步数：{n_moves / max(n_games, 1):.1f}')
+        print(f'读取耗时{elapsed:.2f}秒，每秒{n_games / max(elapsed, 1e-9):.0f}局')
@@ -0,0 +1,239 @@
+import os
+
+import numpy as np
+
+from features import N_PLANES, STATE_SHAPE
+from network import N_ACTIONS
+from symmetry import INVERSE
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 头文件：魔数、版本、容量、累计写入样本数与当前最大优先级。写入位置为 total % capacity
+HEADER_DTYPE = np.dtype([('magic', 'S4'), ('version', '<u4'), ('capacity', '<u8'), ('total', '<u8'), ('max_priority', '<f8')])
+REPLAY_MAGIC = b'VTRB'
+REPLAY_VERSION = 1
+
+# 8种对称变换下，变换后第j格取自变换前的INVERSE[t][j]格
+_GATHER = np.array(INVERSE, dtype=np.intp)
+
+class FileLock:
+    def __init__(self, path: str) -> None:
+        """
+        基于锁文件的跨进程互斥锁，POSIX下使用fcntl.flock，Windows下使用msvcrt.locking。
+
+        Args:
+            path (str): 锁文件路径，不存在时创建。
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        self.file = None
+
+    def __enter__(self) -> 'FileLock':
+        self.file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+def augment(states: np.ndarray, pis: np.ndarray, transforms: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    对每个样本施加一种棋盘对称变换（见symmetry.PERMS），局面平面与落子分布同步变换，对局结果不变。
+
+    Args:
+        states (np.ndarray): 形状为(B, *STATE_SHAPE)的编码局面。
+        pis (np.ndarray): 形状为(B, 9)的落子分布。
+        transforms (np.ndarray): 形状为(B,)的变换编号，取值0-7。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 变换后的编码局面与落子分布。
+
+    """
+    gather = _GATHER[transforms]
+    flat = states.reshape(len(states), N_PLANES, 9)
+    states = np.take_along_axis(flat, gather[:, None, :], axis=2).reshape(states.shape)
+    pis = np.take_along_axis(pis, gather, axis=1)
+    return states, pis
+
+class ReplayBuffer:
+    def __init__(self, path: str, capacity: int | None = None) -> None:
+        """
+        以内存映射的NumPy文件保存的定长环形经验池，样本为编码局面、MCTS访问分布与对局结果，写满后覆盖最早的样本。
+
+        数据保存在目录path下：states.npy（uint8，棋子平面只取0或1）、pis.npy、zs.npy、priorities.npy，
+        以及记录累计写入数的header.bin。目录已存在时直接打开，写入位置从头文件恢复，因此重启后可继续追加。
+        多个进程可以同时打开同一目录，append在文件锁内写入样本后再推进头文件中的计数；
+        抽样只读取被抽中的行，不会把整个经验池读入内存。
+
+        Args:
+            path (str): 经验池目录。
+            capacity (int | None, optional): 新建时的容量；打开已有经验池时可省略，给定时需与已有容量一致。默认为None。
+
+        Returns:
+            None
+
+        """
+        self.path = path
+        self.lock = FileLock(os.path.join(path, 'lock'))
+        header_path = os.path.join(path, 'header.bin')
+        if not os.path.exists(header_path):
+            if capacity is None:
+                raise ValueError(f'{path} 不是经验池目录，新建时需指定容量')
+            os.makedirs(path, exist_ok=True)
+            with self.lock:
+                if not os.path.exists(header_path):
+                    self._create(header_path, capacity)
+        self.header = np.memmap(header_path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+        if self.header['magic'][0] != REPLAY_MAGIC:
+            raise ValueError(f'{path} 不是经验池目录')
+        if self.header['version'][0] != REPLAY_VERSION:
+            raise ValueError(f'不支持的经验池版本：{self.header["version"][0]}')
+        self.capacity = int(self.header['capacity'][0])
+        if capacity is not None and capacity != self.capacity:
+            raise ValueError(f'经验池容量为{self.capacity}，与指定的{capacity}不一致')
+        self.states = np.load(os.path.join(path, 'states.npy'), mmap_mode='r+')
+        self.pis = np.load(os.path.join(path, 'pis.npy'), mmap_mode='r+')
+        self.zs = np.load(os.path.join(path, 'zs.npy'), mmap_mode='r+')
+        self.priorities = np.load(os.path.join(path, 'priorities.npy'), mmap_mode='r+')
+
+    def _create(self, header_path: str, capacity: int) -> None:
+        for name, shape, dtype in (('states', (capacity,) + STATE_SHAPE, np.uint8), ('pis', (capacity, N_ACTIONS), np.float32),
+                                   ('zs', (capacity,), np.float32), ('priorities', (capacity,), np.float32)):
+            array = np.lib.format.open_memmap(os.path.join(self.path, f'{name}.npy'), mode='w+', dtype=dtype, shape=shape)
+            array.flush()
+            del array
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header['magic'] = REPLAY_MAGIC
+        header['version'] = REPLAY_VERSION
+        header['capacity'] = capacity
+        header['max_priority'] = 1.0
+        # 头文件最后写入，其存在即表示数据文件已完整创建
+        header.tofile(header_path)
+
+    @property
+    def total(self) -> int:
+        return int(self.header['total'][0])
+
+    @property
+    def cursor(self) -> int:
+        return self.total % self.capacity
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def append(self, states: np.ndarray, pis: np.ndarray, zs: np.ndarray) -> None:
+        """
+        追加一批样本，新样本的优先级取当前最大优先级，保证至少被抽到一次。
+
+        Args:
+            states (np.ndarray): 形状为(n, *STATE_SHAPE)的编码局面。
+            pis (np.ndarray): 形状为(n, 9)的MCTS访问分布。
+            zs (np.ndarray): 形状为(n,)的对局结果，行棋方视角。
+
+        Returns:
+            None
+
+        """
+        n = len(zs)
+        if n == 0:
+            return
+        # 超过容量时只需写入最后capacity个样本，写入位置与逐个追加全部样本时相同，累计写入数仍增加n
+        kept = min(n, self.capacity)
+        states, pis, zs = states[n - kept:], pis[n - kept:], zs[n - kept:]
+        with self.lock:
+            total = self.total
+            index = (total + n - kept + np.arange(kept)) % self.capacity
+            self.states[index] = states
+            self.pis[index] = pis
+            self.zs[index] = zs
+            self.priorities[index] = self.header['max_priority'][0]
+            self.header['total'] = total + n
+
+    def sample(self, batch_size: int, rng: np.random.Generator, augment_symmetry: bool = False,
+               alpha: float = 0.0, beta: float = 0.4) -> dict[str, np.ndarray]:
+        """
+        随机抽取一个小批量。alpha为0时均匀抽样；否则按优先级的alpha次方成比例抽样，
+        并返回用于修正偏差的重要性权重(N·P)^-beta（按批内最大值归一化）。
+
+        Args:
+            batch_size (int): 批量大小。
+            rng (np.random.Generator): 随机数生成器。
+            augment_symmetry (bool, optional): 是否对每个样本随机施加8种对称变换之一。默认为False。
+            alpha (float, optional): 优先级指数，0为均匀抽样。默认为0.0。
+            beta (float, optional): 重要性权重指数。默认为0.4。
+
+        Returns:
+            dict[str, np.ndarray]: 包含index、states（float32）、pis、zs、weights（均匀抽样时全为1），
+                以及抽样时的累计写入样本数total（传给update_priorities）。
+
+        """
+        total = self.total
+        size = min(total, self.capacity)
+        if size == 0:
+            raise ValueError('经验池为空')
+        if alpha:
+            probs = np.power(self.priorities[:size], alpha, dtype=np.float64)
+            cumulative = np.cumsum(probs)
+            index = np.searchsorted(cumulative, rng.random(batch_size) * cumulative[-1], side='right')
+            index = np.minimum(index, size - 1)
+            weights = (size * probs[index] / cumulative[-1]) ** -beta
+            weights = (weights / weights.max()).astype(np.float32)
+        else:
+            index = rng.integers(0, size, batch_size)
+            weights = np.ones(batch_size, dtype=np.float32)
+        states = self.states[index].astype(np.float32)
+        pis = self.pis[index]
+        if augment_symmetry:
+            states, pis = augment(states, pis, rng.integers(0, 8, batch_size))
+        return {'index': index, 'states': states, 'pis': pis, 'zs': self.zs[index], 'weights': weights, 'total': total}
+
+    def update_priorities(self, index: np.ndarray, priorities: np.ndarray, eps: float = 1e-3, total: int | None = None) -> None:
+        """
+        更新被抽中样本的优先级，通常取训练后该样本的损失。
+        给定抽样时的累计写入数total时，跳过此后已被其他进程写入新样本的槽位。
+
+        Args:
+            index (np.ndarray): sample返回的样本下标。
+            priorities (np.ndarray): 新的优先级。
+            eps (float, optional): 加到优先级上的下限，避免样本永远不被抽到。默认为1e-3。
+            total (int | None, optional): sample返回的total。默认为None，不检查。
+
+        Returns:
+            None
+
+        """
+        priorities = np.asarray(priorities, dtype=np.float32) + eps
+        index = np.asarray(index)
+        # 与append同在锁内写入，避免覆盖其他进程刚写入同一槽位的新样本的优先级
+        with self.lock:
+            if total is not None:
+                written = self.total - total
+                if written >= self.capacity:
+                    return
+                fresh = (index - total) % self.capacity >= written
+                index, priorities = index[fresh], priorities[fresh]
+                if len(index) == 0:
+                    return
+            self.priorities[index] = priorities
+            self.header['max_priority'] = max(float(self.header['max_priority'][0]), float(priorities.max()))
+
+    def flush(self) -> None:
+        for array in (self.states, self.pis, self.zs, self.priorities, self.header):
+            array.flush()
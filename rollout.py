@@ -0,0 +1,103 @@
+import random
+
+from bitgame import game_queues
+from game import Game
+from tables import AVAILABLES, MOVE_WINS, NEXT_QUEUE, QUEUE_MASK
+
+def winning_moves(own: int, opp: int) -> list[int]:
+    """
+    找出行棋方落子后立即成线的所有位置。落子时行棋方最早的棋子会先消失，因此只有落子后仍成线才算获胜。
+
+    Args:
+        own (int): 行棋方的压缩棋子队列。
+        opp (int): 对手的压缩棋子队列。
+
+    Returns:
+        list[int]: 立即获胜的落子位置ID列表。
+
+    """
+    base = own * 9
+    return [m for m in AVAILABLES[QUEUE_MASK[own] | QUEUE_MASK[opp]] if MOVE_WINS[base + m]]
+
+def heuristic_move(own: int, opp: int) -> int:
+    """
+    启发式走子：能立即获胜则获胜；否则在不给对手留下立即获胜机会的落子中随机选择；
+    若所有落子都无法阻止对手获胜，则随机落子。判断对手机会时考虑了己方落子后最早棋子消失腾出的位置。
+
+    Args:
+        own (int): 行棋方的压缩棋子队列。
+        opp (int): 对手的压缩棋子队列。
+
+    Returns:
+        int: 落子位置ID。
+
+    """
+    base = own * 9
+    legal = AVAILABLES[QUEUE_MASK[own] | QUEUE_MASK[opp]]
+    safe = []
+    for m in legal:
+        if MOVE_WINS[base + m]:
+            return m
+        if not winning_moves(opp, NEXT_QUEUE[base + m]):
+            safe.append(m)
+    return random.choice(safe or legal)
+
+class RolloutEvaluator:
+    def __init__(self, max_depth: int = 60, n_rollouts: int = 1) -> None:
+        """
+        以快速走子模拟作为叶节点估值的策略价值函数，可直接传给MCTS。
+        模拟在两个压缩队列整数上进行，不复制Game对象。
+
+        Args:
+            max_depth (int, optional): 单次模拟的最大步数，超过按和棋计0分。默认为60。
+            n_rollouts (int, optional): 每个叶节点的模拟次数，结果取平均。默认为1。
+
+        Returns:
+            None
+
+        """
+        self.max_depth = max_depth
+        self.n_rollouts = n_rollouts
+
+    def rollout(self, own: int, opp: int) -> float:
+        """
+        从给定局面模拟到终局或最大步数。
+
+        Args:
+            own (int): 行棋方的压缩棋子队列。
+            opp (int): 对手的压缩棋子队列。
+
+        Returns:
+            float: 以起始行棋方视角的结果，胜为1，负为-1，和或未分胜负为0。
+
+        """
+        sign = 1.0
+        for _ in range(self.max_depth):
+            index = own * 9 + heuristic_move(own, opp)
+            if MOVE_WINS[index]:
+                return sign
+            own = NEXT_QUEUE[index]
+            own, opp = opp, own
+            sign = -sign
+        return 0.0
+
+    def __call__(self, state: Game) -> tuple[list[tuple[int, float]], float]:
+        """
+        返回均匀的动作先验以及走子模拟得到的叶节点价值。
+
+        Args:
+            state (Game): 游戏状态。
+
+        Returns:
+            tuple[list[tuple[int, float]], float]: 动作先验列表与当前行棋方视角的叶节点价值。
+
+        """
+        legal_moves = state.availables
+        action_probs = [(move, 1.0 / len(legal_moves)) for move in legal_moves]
+        if state.game_end()[0]:
+            return action_probs, 0.0
+        own, opp = game_queues(state)
+        value = sum(self.rollout(own, opp) for _ in range(self.n_rollouts)) / self.n_rollouts
+        return action_probs, value
+
+rollout_policy_value = RolloutEvaluator()
@@ -0,0 +1,256 @@
+import argparse
+import random
+import struct
+import time
+from multiprocessing import Pool
+from typing import Iterator
+
+import numpy as np
+
+from bitgame import BitGame
+from game import Game
+from mcts import MCTS
+from network import PolicyValueNet
+from parallel import seed_worker
+from play import policy_value_fn, random_policy_value
+from rollout import rollout_policy_value
+from solver import TablePlayer
+
+POLICIES = {
+    'uniform': policy_value_fn,
+    'random': random_policy_value,
+    'rollout': rollout_policy_value,
+}
+
+class RandomPlayer:
+    def get_move(self, state:Game) -> int:
+        """
+        随机选择一个合法落子。
+
+        Args:
+            state (Game): 游戏当前状态。
+
+        Returns:
+            int: 落子位置ID。
+
+        """
+        return random.choice(state.availables)
+
+    def update_with_move(self, last_move:int) -> None:
+        pass
+
+def make_player(spec:str):
+    """
+    根据描述字符串创建玩家，所有玩家都提供get_move与update_with_move接口。
+
+    支持的描述：
+        random                          随机落子
+        mcts[:策略[:模拟次数[:c_puct]]]   MCTS，策略为uniform、random、rollout或网络检查点（.npz，使用批量搜索），默认为uniform:2000:1
+        table[:表文件路径]                查表玩家，默认为solver_table.bin
+
+    Args:
+        spec (str): 玩家描述字符串。
+
+    Returns:
+        玩家对象。
+
+    """
+    kind, *args = spec.split(':')
+    if kind == 'random':
+        return RandomPlayer()
+    if kind == 'mcts':
+        n_playout = int(args[1]) if len(args) > 1 else 2000
+        c_puct = float(args[2]) if len(args) > 2 else 1.0
+        if args and args[0].endswith('.npz'):
+            net = PolicyValueNet.load(args[0])
+            return MCTS(net.policy_value, c_puct, n_playout, undo=True, policy_value_batch_fn=net.policy_value_batch)
+        policy = POLICIES[args[0]] if len(args) > 0 else policy_value_fn
+        return MCTS(policy, c_puct, n_playout, undo=True)
+    if kind == 'table':
+        return TablePlayer(args[0] if args else 'solver_table.bin')
+    raise ValueError(f'未知的玩家类型：{spec}')
+
+def play_game(player1, player2, start_player:int=1, max_moves:int=200, move_times:list[tuple[int, float]]|None=None) -> tuple[int, list[int]]:
+    """
+    无界面地进行一局对弈。由于棋子会消失，对局可能无限循环，超过max_moves步按和棋处理。
+
+    Args:
+        player1: 玩家1。
+        player2: 玩家2。
+        start_player (int, optional): 先手玩家编号。默认为1。
+        max_moves (int, optional): 最大步数。默认为200。
+        move_times (list[tuple[int, float]]|None, optional): 给定时依次追加每步的(玩家编号, get_move耗时秒数)。默认为None。
+
+    Returns:
+        tuple[int, list[int]]: 获胜者编号（和棋为0）以及落子序列。
+
+    """
+    players = {1: player1, 2: player2}
+    for player in players.values():
+        player.update_with_move(-1)
+    game = BitGame()
+    game.init_board(start_player)
+    moves = []
+    while len(moves) < max_moves:
+        start = time.perf_counter()
+        move = players[game.current_player].get_move(game)
+        if move_times is not None:
+            move_times.append((game.current_player, time.perf_counter() - start))
+        game.do_move(move)
+        moves.append(move)
+        for player in players.values():
+            player.update_with_move(move)
+        done, winner = game.game_end()
+        if done:
+            return winner or 0, moves
+    return 0, moves
+
+_players = None
+_max_moves = None
+
+def _init_worker(spec1:str, spec2:str, max_moves:int) -> None:
+    global _players, _max_moves
+    seed_worker()
+    _players = (make_player(spec1), make_player(spec2))
+    _max_moves = max_moves
+
+def _play(index:int) -> tuple[int, int, bytes]:
+    # 交替先手
+    start_player = 1 + index % 2
+    winner, moves = play_game(*_players, start_player=start_player, max_moves=_max_moves)
+    return winner, start_player, bytes(moves)
+
+# 结果文件由若干行组组成，每个行组先写入对局数与落子总数，
+# 再依次写入 winner(int8)、start(int8)、length(uint16) 三列以及拼接后的落子序列(uint8)。
+RESULTS_MAGIC = b'VTTR'
+ROW_GROUP = struct.Struct('<II')
+
+class ResultWriter:
+    def __init__(self, path:str, row_group_size:int=4096) -> None:
+        """
+        以列式行组流式写入对局结果，内存占用只与行组大小有关。
+
+        Args:
+            path (str): 输出文件路径。
+            row_group_size (int, optional): 每个行组的对局数。默认为4096。
+
+        Returns:
+            None
+
+        """
+        self.file = open(path, 'wb')
+        self.file.write(RESULTS_MAGIC)
+        self.row_group_size = row_group_size
+        self._reset()
+
+    def _reset(self) -> None:
+        self.winners = []
+        self.starts = []
+        self.lengths = []
+        self.moves = bytearray()
+
+    def write(self, winner:int, start_player:int, moves:bytes) -> None:
+        """
+        追加一局结果。
+
+        Args:
+            winner (int): 获胜者编号，和棋为0。
+            start_player (int): 先手玩家编号。
+            moves (bytes): 落子序列，每步一个字节。
+
+        Returns:
+            None
+
+        """
+        self.winners.append(winner)
+        self.starts.append(start_player)
+        self.lengths.append(len(moves))
+        self.moves += moves
+        if len(self.winners) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.winners:
+            return
+        self.file.write(ROW_GROUP.pack(len(self.winners), len(self.moves)))
+        self.file.write(np.array(self.winners, dtype=np.int8).tobytes())
+        self.file.write(np.array(self.starts, dtype=np.int8).tobytes())
+        self.file.write(np.array(self.lengths, dtype='<u2').tobytes())
+        self.file.write(self.moves)
+        self._reset()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def read_results(path:str) -> Iterator[dict[str, np.ndarray]]:
+    """
+    按行组读取对局结果文件。
+
+    Args:
+        path (str): 结果文件路径。
+
+    Yields:
+        dict[str, np.ndarray]: 包含winner、start、length、moves列的行组，moves为拼接后的落子序列。
+
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(RESULTS_MAGIC)) != RESULTS_MAGIC:
+            raise ValueError(f'{path} 不是对局结果文件')
+        while True:
+            header = f.read(ROW_GROUP.size)
+            if not header:
+                return
+            n_games, n_moves = ROW_GROUP.unpack(header)
+            yield {
+                'winner': np.frombuffer(f.read(n_games), dtype=np.int8),
+                'start': np.frombuffer(f.read(n_games), dtype=np.int8),
+                'length': np.frombuffer(f.read(2 * n_games), dtype='<u2'),
+                'moves': np.frombuffer(f.read(n_moves), dtype=np.uint8),
+            }
+
+def run(spec1:str, spec2:str, n_games:int, out:str, n_workers:int|None=None, max_moves:int=200, chunksize:int=16) -> dict[str, float]:
+    """
+    用进程池批量进行对局，并将结果流式写入文件。
+
+    Args:
+        spec1 (str): 玩家1描述，见make_player。
+        spec2 (str): 玩家2描述，见make_player。
+        n_games (int): 对局数，先手在两位玩家之间交替。
+        out (str): 输出文件路径。
+        n_workers (int|None, optional): 进程数，默认为CPU核数。
+        max_moves (int, optional): 每局最大步数，超过按和棋处理。默认为200。
+        chunksize (int, optional): 每次分发给工作进程的对局数。默认为16。
+
+    Returns:
+        dict[str, float]: 玩家1胜、玩家2胜、和棋局数以及每秒对局数。
+
+    """
+    summary = {'player1': 0, 'player2': 0, 'draw': 0}
+    start = time.perf_counter()
+    with Pool(n_workers, initializer=_init_worker, initargs=(spec1, spec2, max_moves)) as pool, ResultWriter(out) as writer:
+        for winner, start_player, moves in pool.imap_unordered(_play, range(n_games), chunksize):
+            writer.write(winner, start_player, moves)
+            summary[('draw', 'player1', 'player2')[winner]] += 1
+    summary['games_per_sec'] = n_games / (time.perf_counter() - start)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='无界面批量对局')
+    parser.add_argument('player1', help='玩家1，例如 mcts:uniform:400、mcts:checkpoints/latest.npz:200、random、table:solver_table.bin')
+    parser.add_argument('player2', help='玩家2')
+    parser.add_argument('-n', '--games', type=int, default=1000, help='对局数')
+    parser.add_argument('-o', '--out', default='selfplay.bin', help='输出文件')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='进程数，默认为CPU核数')
+    parser.add_argument('--max-moves', type=int, default=200, help='每局最大步数')
+    args = parser.parse_args()
+    summary = run(args.player1, args.player2, args.games, args.out, args.workers, args.max_moves)
+    print(f'玩家1胜：{summary["player1"]} 玩家2胜：{summary["player2"]} 和棋：{summary["draw"]}')
+    print(f'每秒对局数：{summary["games_per_sec"]:.1f}')
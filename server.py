@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bitgame import BitGame
+from mcts import MCTS
+from parallel import seed_worker
+from play import policy_value_fn
+
+# 行协议（UTF-8，每行一条命令，每条命令恰好得到一行回复）：
+#   NEW [ai]     开始新对局，客户端为玩家1、AI为玩家2；带ai时AI先手
+#                回复 OK，或AI先手时回复 AI <落子> <思考毫秒数>
+#   MOVE <id>    客户端落子（位置ID 0-8）
+#                回复 AI <落子> <思考毫秒数>，或对局结束时回复 END <you|ai|draw> <AI落子或->
+#   QUIT         结束会话，回复 BYE 后关闭连接
+# 出错时回复 ERR <说明>，会话状态不变。
+
+# 工作进程留给自身的时间余量（秒），用于回传结果
+DEADLINE_MARGIN = 0.005
+
+_sessions = {}
+_n_playout = None
+_c_puct = None
+_max_moves = None
+
+def _init_worker(n_playout: int, c_puct: float, max_moves: int) -> None:
+    global _n_playout, _c_puct, _max_moves
+    seed_worker()
+    _n_playout, _c_puct, _max_moves = n_playout, c_puct, max_moves
+
+def _think(session: dict, deadline: float) -> tuple[int, float]:
+    """
+    在截止时间前为AI搜索并执行一步落子。排队等待的时间也计入截止时间，
+    若轮到本会话时已无剩余时间，搜索只做最少的模拟。
+
+    Args:
+        session (dict): 工作进程中的会话状态。
+        deadline (float): 绝对截止时间（time.time()）。
+
+    Returns:
+        tuple[int, float]: AI的落子与实际思考耗时（毫秒）。
+
+    """
+    game, mcts = session['game'], session['mcts']
+    start = time.time()
+    # 已无剩余时间时搜索只做最少的模拟，落子为先验概率最高的动作
+    move = mcts.get_move(game, time_limit=max(deadline - start - DEADLINE_MARGIN, 0.0))
+    game.do_move(move)
+    mcts.update_with_move(move)
+    session['n_moves'] += 1
+    return move, (time.time() - start) * 1000
+
+def _result(game: BitGame, n_moves: int) -> str | None:
+    done, winner = game.game_end()
+    if done:
+        return 'draw' if winner is None else ('you' if winner == 1 else 'ai')
+    if n_moves >= _max_moves:
+        return 'draw'
+    return None
+
+def _new_session(sid: int, ai_first: bool, deadline: float) -> tuple[int, float] | None:
+    """
+    在工作进程中创建会话，会话的游戏与搜索树此后一直保存在该进程中。
+
+    Args:
+        sid (int): 会话编号。
+        ai_first (bool): 是否AI先手。
+        deadline (float): AI先手时第一步的截止时间。
+
+    Returns:
+        tuple[int, float] | None: AI先手时为AI的落子与思考耗时，否则为None。
+
+    """
+    game = BitGame()
+    game.init_board(2 if ai_first else 1)
+    session = {'game': game, 'mcts': MCTS(policy_value_fn, _c_puct, _n_playout, undo=True), 'n_moves': 0}
+    _sessions[sid] = session
+    if ai_first:
+        return _think(session, deadline)
+    return None
+
+def _play(sid: int, move: int, deadline: float) -> tuple[str, int, float, str | None]:
+    """
+    执行客户端的落子，若对局未结束则接着让AI落子。
+
+    Args:
+        sid (int): 会话编号。
+        move (int): 客户端落子的位置ID。
+        deadline (float): AI落子的截止时间。
+
+    Returns:
+        tuple[str, int, float, str | None]: 状态（'ok'或'error'）、AI落子（没有时为-1）、思考耗时（毫秒）与结果（未结束为None，出错时为说明）。
+
+    """
+    session = _sessions.get(sid)
+    if session is None:
+        return 'error', -1, 0.0, '请先发送NEW'
+    game = session['game']
+    if _result(game, session['n_moves']) is not None:
+        return 'error', -1, 0.0, '对局已结束，请发送NEW'
+    if game.current_player != 1 or move not in game.availables:
+        return 'error', -1, 0.0, f'非法落子：{move}'
+    game.do_move(move)
+    session['mcts'].update_with_move(move)
+    session['n_moves'] += 1
+    result = _result(game, session['n_moves'])
+    if result is not None:
+        return 'ok', -1, 0.0, result
+    ai_move, think_ms = _think(session, deadline)
+    return 'ok', ai_move, think_ms, _result(game, session['n_moves'])
+
+def _close_session(sid: int) -> None:
+    _sessions.pop(sid, None)
+
+
+class GameServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, n_workers: int | None = None, n_playout: int = 400, c_puct: float = 1.0,
+                 move_deadline: float = 0.5, max_sessions: int = 10000, max_pending: int = 64, max_moves: int = 200) -> None:
+        """
+        基于asyncio的对弈服务器。每个连接是一个会话，拥有独立的游戏与搜索树。
+        会话固定分配到某个单进程执行器上，游戏与搜索树只保存在该工作进程中，每步只传递落子。
+
+        背压：每个连接逐条处理命令，回复发送完成前不读取下一条命令；
+        每个工作进程同时排队的搜索数不超过max_pending，超出时新的请求在事件循环中等待；
+        会话数达到max_sessions时拒绝新连接。
+
+        Args:
+            host (str, optional): 监听地址。默认为'127.0.0.1'。
+            port (int, optional): 监听端口。默认为8765。
+            n_workers (int | None, optional): 工作进程数，默认为CPU核数。
+            n_playout (int, optional): AI每步的最大模拟次数。默认为400。
+            c_puct (float, optional): UCT公式中的探索系数。默认为1.0。
+            move_deadline (float, optional): 从收到命令到AI落子的时间上限（秒），包括排队时间。默认为0.5。
+            max_sessions (int, optional): 最大同时会话数。默认为10000。
+            max_pending (int, optional): 每个工作进程排队的最大请求数。默认为64。
+            max_moves (int, optional): 每局最大步数，超过按和棋处理。默认为200。
+
+        Returns:
+            None
+
+        """
+        self.host = host
+        self.port = port
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.move_deadline = move_deadline
+        self.max_sessions = max_sessions
+        self.executors = [ProcessPoolExecutor(1, initializer=_init_worker, initargs=(n_playout, c_puct, max_moves))
+                          for _ in range(self.n_workers)]
+        self.pending = [asyncio.Semaphore(max_pending) for _ in range(self.n_workers)]
+        self.session_ids = itertools.count()
+        self.n_sessions = 0
+        self.n_moves = 0
+        self.server = None
+
+    async def _call(self, sid: int, fn, *args):
+        worker = sid % self.n_workers
+        async with self.pending[worker]:
+            return await asyncio.get_running_loop().run_in_executor(self.executors[worker], fn, sid, *args)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        处理一个连接上的全部命令。
+
+        Args:
+            reader (asyncio.StreamReader): 连接读取端。
+            writer (asyncio.StreamWriter): 连接写入端。
+
+        Returns:
+            None
+
+        """
+        if self.n_sessions >= self.max_sessions:
+            writer.write('ERR 服务器会话数已满\n'.encode())
+            await writer.drain()
+            writer.close()
+            return
+        sid = next(self.session_ids)
+        self.n_sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = await self._dispatch(sid, line.decode().split())
+                writer.write(reply.encode() + b'\n')
+                await writer.drain()
+                if reply == 'BYE':
+                    break
+        except (ConnectionError, UnicodeDecodeError, ValueError):
+            pass
+        finally:
+            self.n_sessions -= 1
+            writer.close()
+            await self._call(sid, _close_session)
+
+    async def _dispatch(self, sid: int, tokens: list[str]) -> str:
+        deadline = time.time() + self.move_deadline
+        if not tokens:
+            return 'ERR 空命令'
+        command = tokens[0].upper()
+        if command == 'NEW':
+            ai_first = len(tokens) > 1 and tokens[1].lower() == 'ai'
+            result = await self._call(sid, _new_session, ai_first, deadline)
+            if result is None:
+                return 'OK'
+            self.n_moves += 1
+            return f'AI {result[0]} {result[1]:.1f}'
+        if command == 'MOVE':
+            if len(tokens) < 2:
+                return 'ERR 用法：MOVE <位置ID>'
+            # str.isdigit也接受'²'等int无法解析的字符，直接以int解析并在失败时回复错误
+            try:
+                move = int(tokens[1])
+            except ValueError:
+                return 'ERR 用法：MOVE <位置ID>'
+            status, ai_move, think_ms, result = await self._call(sid, _play, move, deadline)
+            if status == 'error':
+                return f'ERR {result}'
+            if ai_move >= 0:
+                self.n_moves += 1
+            if result is not None:
+                return f'END {result} {ai_move if ai_move >= 0 else "-"}'
+            return f'AI {ai_move} {think_ms:.1f}'
+        if command == 'QUIT':
+            return 'BYE'
+        return f'ERR 未知命令：{tokens[0]}'
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, limit=1024)
+
+    async def serve_forever(self) -> None:
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self) -> None:
+        """
+        停止监听并关闭全部工作进程。
+
+        Args:
+            无参数。
+
+        Returns:
+            None
+
+        """
+        if self.server is not None:
+            self.server.close()
+        for executor in self.executors:
+            executor.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='计客超级井字棋对弈服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='工作进程数，默认为CPU核数')
+    parser.add_argument('-n', '--playouts', type=int, default=400, help='AI每步的最大模拟次数')
+    parser.add_argument('--deadline', type=float, default=0.5, help='每步截止时间（秒），包括排队时间')
+    parser.add_argument('--max-sessions', type=int, default=10000, help='最大同时会话数')
+    parser.add_argument('--max-pending', type=int, default=64, help='每个工作进程排队的最大请求数')
+    args = parser.parse_args()
+    server = GameServer(args.host, args.port, args.workers, args.playouts, move_deadline=args.deadline,
+                        max_sessions=args.max_sessions, max_pending=args.max_pending)
+    print(f'监听 {args.host}:{args.port}，工作进程数：{server.n_workers}')
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
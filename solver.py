@@ -0,0 +1,287 @@
+import mmap
+import struct
+import sys
+from collections import deque
+
+import numpy as np
+
+from bitgame import game_queues
+from game import Game
+from symmetry import INVERSE, canonical_queues
+from tables import AVAILABLES, HAS_LINE, NEXT_QUEUE, QUEUE_MASK, queue_push
+
+# 局面结果，均以当前行棋方的视角表示
+UNKNOWN = 0
+WIN = 1
+LOSS = 2
+DRAW = 3
+
+NO_MOVE = 15
+
+# 表文件头：魔数、版本号、表项字节数、队列编号数、表项数、数据偏移，按64字节对齐
+TABLE_MAGIC = b'VTTT'
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct('<4sHHIQI')
+TABLE_OFFSET = 64
+
+def _build_queue_rank() -> tuple[list[int], list[int]]:
+    """
+    为所有合法的压缩棋子队列（0到3颗互不相同的棋子）编号。
+
+    Args:
+        None
+
+    Returns:
+        tuple[list[int], list[int]]: 压缩队列到编号的映射表（非法队列为-1），以及编号到压缩队列的映射表。
+
+    """
+    rank = [-1] * 0x1000
+    unrank = [0]
+    rank[0] = 0
+    frontier = [0]
+    for _ in range(3):
+        nxt = []
+        for queue in frontier:
+            for cell in AVAILABLES[QUEUE_MASK[queue]]:
+                new_queue, _ = queue_push(queue, cell)
+                rank[new_queue] = len(unrank)
+                unrank.append(new_queue)
+                nxt.append(new_queue)
+        frontier = nxt
+    return rank, unrank
+
+QUEUE_RANK, QUEUE_UNRANK = _build_queue_rank()
+N_QUEUES = len(QUEUE_UNRANK)
+TABLE_SIZE = N_QUEUES * N_QUEUES
+
+def pack(result: int, move: int, dist: int) -> int:
+    """
+    将局面结果、最佳落子和距离压缩为一个16位整数。
+
+    Args:
+        result (int): 局面结果，WIN/LOSS/DRAW之一。
+        move (int): 最佳落子位置ID，没有可行落子时为NO_MOVE。
+        dist (int): 到达结果所需的步数。
+
+    Returns:
+        int: 压缩后的表项。
+
+    """
+    return result | (move << 2) | (dist << 6)
+
+def unpack(entry: int) -> tuple[int, int, int]:
+    """
+    将表项拆分为局面结果、最佳落子和距离。
+
+    Args:
+        entry (int): 压缩后的表项。
+
+    Returns:
+        tuple[int, int, int]: 局面结果、最佳落子位置ID和到达结果所需的步数。
+
+    """
+    entry = int(entry)
+    return entry & 0x3, (entry >> 2) & 0xF, entry >> 6
+
+def state_index(own: int, opp: int) -> int:
+    """
+    计算局面在表中的下标。
+
+    Args:
+        own (int): 当前行棋方的压缩棋子队列。
+        opp (int): 对手的压缩棋子队列。
+
+    Returns:
+        int: 局面下标。
+
+    """
+    return QUEUE_RANK[own] * N_QUEUES + QUEUE_RANK[opp]
+
+def solve(verbose: bool = False) -> np.ndarray:
+    """
+    枚举所有可达局面并进行逆向分析，求出每个局面的胜负平结果、最佳落子与到达结果的步数。
+    对称的局面只求解其规范代表（见symmetry.canonical_queues），最佳落子以规范代表的坐标表示。
+
+    Args:
+        verbose (bool, optional): 是否打印求解进度。默认为False。
+
+    Returns:
+        np.ndarray: 长度为TABLE_SIZE的uint16数组，表项格式见pack，不可达局面与非规范局面为0。
+
+    """
+    # 枚举可达局面，并记录每个局面的前驱（前驱下标, 落子）
+    start = state_index(0, 0)
+    children = {}
+    parents = {start: []}
+    frontier = deque([(0, 0)])
+    while frontier:
+        own, opp = frontier.popleft()
+        index = state_index(own, opp)
+        if HAS_LINE[QUEUE_MASK[opp]]:
+            children[index] = 0
+            continue
+        count = 0
+        for move in AVAILABLES[QUEUE_MASK[own] | QUEUE_MASK[opp]]:
+            new_own = NEXT_QUEUE[own * 9 + move]
+            child_own, child_opp, _ = canonical_queues(opp, new_own)
+            child = state_index(child_own, child_opp)
+            if child not in parents:
+                parents[child] = []
+                frontier.append((child_own, child_opp))
+            parents[child].append((index, move))
+            count += 1
+        children[index] = count
+    if verbose:
+        print(f'可达规范局面数：{len(children)}')
+
+    # 从终局开始逆向传播结果
+    table = np.zeros(TABLE_SIZE, dtype=np.uint16)
+    dist = {}
+    queue = deque()
+    for index, count in children.items():
+        if count == 0:
+            table[index] = pack(LOSS, NO_MOVE, 0)
+            dist[index] = 0
+            queue.append(index)
+    while queue:
+        child = queue.popleft()
+        result = int(table[child]) & 0x3
+        for parent, move in parents[child]:
+            if parent in dist:
+                continue
+            if result == LOSS:
+                dist[parent] = dist[child] + 1
+                table[parent] = pack(WIN, move, dist[parent])
+                queue.append(parent)
+            else:
+                children[parent] -= 1
+                if children[parent] == 0:
+                    # 按距离顺序处理，最后一个被确定的子局面距离最远
+                    dist[parent] = dist[child] + 1
+                    table[parent] = pack(LOSS, move, dist[parent])
+                    queue.append(parent)
+
+    # 剩余局面均为和棋，最佳落子选择任一走向和棋的子局面
+    resolved = set(dist)
+    for index, move_list in parents.items():
+        if index in resolved:
+            continue
+        for parent, move in move_list:
+            if parent not in dist:
+                dist[parent] = 0
+                table[parent] = pack(DRAW, move, 0)
+    if verbose:
+        results = table[table > 0] & 0x3
+        print(f'胜：{np.sum(results == WIN)} 负：{np.sum(results == LOSS)} 和：{np.sum(results == DRAW)}')
+    return table
+
+def save_table(table: np.ndarray, path: str) -> None:
+    """
+    将求解结果写入表文件，文件由64字节文件头和小端uint16的稠密表组成。
+
+    Args:
+        table (np.ndarray): solve返回的表。
+        path (str): 文件路径。
+
+    Returns:
+        None
+
+    """
+    header = TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, 2, N_QUEUES, len(table), TABLE_OFFSET)
+    with open(path, 'wb') as f:
+        f.write(header.ljust(TABLE_OFFSET, b'\0'))
+        f.write(table.astype('<u2').tobytes())
+
+def load_table(path: str) -> np.ndarray:
+    """
+    以内存映射方式打开表文件，返回直接指向映射内存的只读数组，不解析也不复制数据。
+    多个进程打开同一文件时共享同一份页缓存。
+
+    Args:
+        path (str): 文件路径。
+
+    Returns:
+        np.ndarray: 长度为TABLE_SIZE的只读uint16数组。
+
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(mm) < TABLE_OFFSET:
+        raise ValueError(f'{path} 不是求解表文件')
+    magic, version, itemsize, n_queues, count, offset = TABLE_HEADER.unpack_from(mm)
+    if magic != TABLE_MAGIC:
+        raise ValueError(f'{path} 不是求解表文件')
+    if version != TABLE_VERSION:
+        raise ValueError(f'不支持的求解表版本：{version}')
+    if itemsize != 2 or n_queues != N_QUEUES or count != TABLE_SIZE:
+        raise ValueError(f'求解表与当前局面编号不匹配：{path}')
+    if len(mm) < offset + count * itemsize:
+        raise ValueError(f'求解表文件不完整：{path}')
+    return np.frombuffer(memoryview(mm), dtype='<u2', count=count, offset=offset)
+
+class TablePlayer:
+    def __init__(self, table: np.ndarray | str) -> None:
+        """
+        基于完美求解表的玩家，每步只需一次局面规范化与一次数组查找。
+
+        Args:
+            table (np.ndarray | str): solve返回的表或表文件路径，文件以内存映射方式打开。
+
+        Returns:
+            None
+
+        """
+        if isinstance(table, str):
+            table = load_table(table)
+        self.table = table
+
+    def evaluate(self, state: Game) -> tuple[int, int]:
+        """
+        查询局面的理论结果。
+
+        Args:
+            state (Game): 游戏状态。
+
+        Returns:
+            tuple[int, int]: 以当前行棋方视角的结果（WIN/LOSS/DRAW，不可达为UNKNOWN）以及到达结果的步数。
+
+        """
+        own, opp, _ = canonical_queues(*game_queues(state))
+        result, _, dist = unpack(self.table[state_index(own, opp)])
+        return result, dist
+
+    def get_move(self, state: Game) -> int:
+        """
+        查表获取最佳下棋动作。
+
+        Args:
+            state (Game): 游戏当前状态。
+
+        Returns:
+            int: 最佳下棋动作编号。
+
+        """
+        own, opp, t = canonical_queues(*game_queues(state))
+        _, move, _ = unpack(self.table[state_index(own, opp)])
+        if move == NO_MOVE:
+            return state.availables[0]
+        return INVERSE[t][move]
+
+    def update_with_move(self, last_move: int) -> None:
+        """
+        与MCTS接口保持一致，查表玩家无需维护搜索树。
+
+        Args:
+            last_move (int): 上一步的移动id
+
+        Returns:
+            None
+
+        """
+        pass
+
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else 'solver_table.bin'
+    save_table(solve(verbose=True), path)
+    print(f'已写入 {path}')
@@ -0,0 +1,125 @@
+from bitgame import game_queues
+from game import Game, move_id2move_actions, move_actions2move_id
+
+def _build_perms() -> tuple[tuple[int, ...], ...]:
+    """
+    构建3x3棋盘8种对称变换对应的位置ID置换。
+
+    Args:
+        None
+
+    Returns:
+        tuple[tuple[int, ...], ...]: PERMS[t][位置ID]为第t种变换后的位置ID，t=0为恒等变换。
+
+    """
+    transforms = (
+        lambda y, x: (y, x),          # 恒等
+        lambda y, x: (x, 2 - y),      # 顺时针旋转90度
+        lambda y, x: (2 - y, 2 - x),  # 旋转180度
+        lambda y, x: (2 - x, y),      # 顺时针旋转270度
+        lambda y, x: (y, 2 - x),      # 左右翻转
+        lambda y, x: (2 - y, x),      # 上下翻转
+        lambda y, x: (x, y),          # 主对角线翻转
+        lambda y, x: (2 - x, 2 - y),  # 副对角线翻转
+    )
+    return tuple(tuple(move_actions2move_id[f(*move_id2move_actions[i])] for i in range(9)) for f in transforms)
+
+PERMS = _build_perms()
+INVERSE = tuple(tuple(perm.index(i) for i in range(9)) for perm in PERMS)
+
+def _build_queue_transforms() -> tuple[tuple[int, ...], ...]:
+    """
+    预计算每种对称变换作用在压缩棋子队列上的结果，棋龄顺序保持不变。
+
+    Args:
+        None
+
+    Returns:
+        tuple[tuple[int, ...], ...]: QUEUE_TRANSFORM[t][队列]为变换后的队列。
+
+    """
+    tables = []
+    for perm in PERMS:
+        table = [0] * 0x1000
+        for queue in range(0x1000):
+            out = 0
+            for shift in (0, 4, 8):
+                nibble = (queue >> shift) & 0xF
+                if 0 < nibble <= 9:
+                    out |= (perm[nibble - 1] + 1) << shift
+            table[queue] = out
+        tables.append(tuple(table))
+    return tuple(tables)
+
+QUEUE_TRANSFORM = _build_queue_transforms()
+
+def canonical_queues(own: int, opp: int) -> tuple[int, int, int]:
+    """
+    求局面在8种对称变换下的规范代表，即变换后(own, opp)最小者。
+
+    Args:
+        own (int): 当前行棋方的压缩棋子队列。
+        opp (int): 对手的压缩棋子队列。
+
+    Returns:
+        tuple[int, int, int]: 规范代表的两个队列以及所用变换编号t。
+
+    """
+    best = (own, opp)
+    best_t = 0
+    for t in range(1, 8):
+        table = QUEUE_TRANSFORM[t]
+        candidate = (table[own], table[opp])
+        if candidate < best:
+            best, best_t = candidate, t
+    return best[0], best[1], best_t
+
+def canonicalize(state: Game) -> tuple[int, int]:
+    """
+    将游戏状态（包括棋龄队列）映射到规范代表。由于规则对双方对称，键以行棋方视角表示。
+
+    Args:
+        state (Game): 游戏状态。
+
+    Returns:
+        tuple[int, int]: 规范局面键（行棋方队列左移12位与对手队列拼接）以及所用变换编号t。
+
+    """
+    own, opp, t = canonical_queues(*game_queues(state))
+    return (own << 12) | opp, t
+
+def to_canonical_action(action: int, t: int) -> int:
+    return PERMS[t][action]
+
+def from_canonical_action(action: int, t: int) -> int:
+    return INVERSE[t][action]
+
+def to_canonical_priors(action_priors: list[tuple[int, float]], t: int) -> list[tuple[int, float]]:
+    """
+    将实际局面下的动作先验映射到规范局面。
+
+    Args:
+        action_priors (list[tuple[int, float]]): 实际局面下的(动作, 先验概率)列表。
+        t (int): 变换编号。
+
+    Returns:
+        list[tuple[int, float]]: 规范局面下的(动作, 先验概率)列表。
+
+    """
+    perm = PERMS[t]
+    return [(perm[action], prob) for action, prob in action_priors]
+
+def from_canonical_priors(action_priors: list[tuple[int, float]], t: int) -> list[tuple[int, float]]:
+    """
+    将规范局面下的动作先验映射回实际局面。
+
+    Args:
+        action_priors (list[tuple[int, float]]): 规范局面下的(动作, 先验概率)列表。
+        t (int): 变换编号。
+
+    Returns:
+        list[tuple[int, float]]: 实际局面下的(动作, 先验概率)列表。
+
+    """
+    inverse = INVERSE[t]
+    return [(inverse[action], prob) for action, prob in action_priors]
@@ -0,0 +1,149 @@
+from game import move_id2move_actions
+
+# 每条获胜线对应的9位掩码，第 i 位表示落子位置ID为 i 的格子
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # 横线
+    0b001001001, 0b010010010, 0b100100100,  # 竖线
+    0b100010001, 0b001010100,               # 对角线
+)
+
+FULL_MASK = 0b111111111
+
+# 每个格子所在获胜线的掩码，落子后只需检查经过该格子的线
+CELL_WIN_MASKS = tuple(tuple(m for m in WIN_MASKS if m >> cell & 1) for cell in range(9))
+
+def has_line(mask: int) -> bool:
+    """
+    判断掩码中是否存在一条完整的获胜线。
+
+    Args:
+        mask (int): 某一玩家棋子的9位掩码。
+
+    Returns:
+        bool: 若存在获胜线则返回True，否则返回False。
+
+    """
+    for line in WIN_MASKS:
+        if mask & line == line:
+            return True
+    return False
+
+def queue_push(queue: int, cell: int) -> tuple[int, int]:
+    """
+    将新落子压入玩家的棋子队列，队列满三颗时最早的一颗棋子会消失。
+
+    队列按从旧到新的顺序，每4位保存一个"位置ID+1"，0表示空位。
+
+    Args:
+        queue (int): 压缩后的棋子队列。
+        cell (int): 新落子的位置ID，从0到8。
+
+    Returns:
+        tuple[int, int]: 新的棋子队列，以及消失棋子的位置ID（没有棋子消失时为-1）。
+
+    """
+    if queue >= 0x100:
+        return (queue >> 4) | ((cell + 1) << 8), (queue & 0xF) - 1
+    if queue >= 0x10:
+        return queue | ((cell + 1) << 8), -1
+    if queue:
+        return queue | ((cell + 1) << 4), -1
+    return cell + 1, -1
+
+def queue_cells(queue: int) -> list[int]:
+    """
+    将压缩后的棋子队列展开为位置ID列表。
+
+    Args:
+        queue (int): 压缩后的棋子队列。
+
+    Returns:
+        list[int]: 按从旧到新排列的位置ID列表。
+
+    """
+    cells = []
+    while queue:
+        cells.append((queue & 0xF) - 1)
+        queue >>= 4
+    return cells
+
+def queue_mask(queue: int) -> int:
+    """
+    计算棋子队列对应的9位掩码。
+
+    Args:
+        queue (int): 压缩后的棋子队列。
+
+    Returns:
+        int: 队列中所有棋子的9位掩码。
+
+    """
+    mask = 0
+    while queue:
+        mask |= 1 << ((queue & 0xF) - 1)
+        queue >>= 4
+    return mask
+
+def is_valid_queue(queue: int) -> bool:
+    """
+    判断12位整数是否为合法的压缩棋子队列：非空格子连续排在低位、位置ID合法且互不相同。
+
+    Args:
+        queue (int): 待检查的整数，0到0xFFF。
+
+    Returns:
+        bool: 合法时返回True。
+
+    """
+    nibbles = [(queue >> s) & 0xF for s in (0, 4, 8)]
+    cells = [n for n in nibbles if n]
+    return nibbles[:len(cells)] == cells and all(n <= 9 for n in cells) and len(set(cells)) == len(cells)
+
+VALID_QUEUES = tuple(queue for queue in range(0x1000) if is_valid_queue(queue))
+
+# 落子效果表。由于掩码完全由队列决定，(掩码, 队列, 落子)的效果只需以(队列, 落子)为键，
+# 下标为 队列*9+落子，非法队列对应的表项为0。均为Python序列以便标量下标访问。
+#   NEXT_QUEUE  落子后的队列
+#   NEXT_MASK   落子后的掩码（已去掉消失的棋子）
+#   VANISHED    消失棋子的位置ID，没有棋子消失时为-1
+#   MOVE_WINS   落子后是否成线
+# 另有按队列或掩码索引的表：
+#   QUEUE_MASK[队列]      队列对应的掩码
+#   HAS_LINE[掩码]        掩码是否包含获胜线
+#   AVAILABLES[占用掩码]  空位的位置ID元组
+#   DISAPPEAR[队列]       该方下一次落子时将消失的棋子坐标，以元组形式给出（队列未满时为空元组）
+def _build_tables() -> tuple:
+    """
+    在导入时构建全部落子效果表，只遍历586个合法队列，耗时约数十毫秒。
+
+    Args:
+        None
+
+    Returns:
+        tuple: NEXT_QUEUE、NEXT_MASK、VANISHED、MOVE_WINS、QUEUE_MASK、HAS_LINE、AVAILABLES、DISAPPEAR。
+
+    """
+    has_lines = tuple(has_line(mask) for mask in range(512))
+    masks = [0] * 0x1000
+    next_queue = [0] * (0x1000 * 9)
+    next_mask = [0] * (0x1000 * 9)
+    vanished = [-1] * (0x1000 * 9)
+    wins = [False] * (0x1000 * 9)
+    disappear = [()] * 0x1000
+    for queue in VALID_QUEUES:
+        masks[queue] = queue_mask(queue)
+        if queue >= 0x100:
+            disappear[queue] = (move_id2move_actions[(queue & 0xF) - 1],)
+    for queue in VALID_QUEUES:
+        base = queue * 9
+        for cell in range(9):
+            new_queue, gone = queue_push(queue, cell)
+            next_queue[base + cell] = new_queue
+            next_mask[base + cell] = masks[new_queue]
+            vanished[base + cell] = gone
+            wins[base + cell] = has_lines[masks[new_queue]]
+    availables = tuple(tuple(i for i in range(9) if not occupied >> i & 1) for occupied in range(512))
+    return (tuple(next_queue), tuple(next_mask), tuple(vanished), tuple(wins),
+            tuple(masks), has_lines, availables, tuple(disappear))
+
+NEXT_QUEUE, NEXT_MASK, VANISHED, MOVE_WINS, QUEUE_MASK, HAS_LINE, AVAILABLES, DISAPPEAR = _build_tables()
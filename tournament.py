@@ -0,0 +1,234 @@
+import argparse
+import itertools
+import json
+import math
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from parallel import seed_worker
+from selfplay import make_player, play_game
+
+# Elo分差与胜率的换算：E = 1 / (1 + 10^(-d/400))
+ELO_SCALE = math.log(10) / 400
+
+_specs = None
+_players = {}
+_max_moves = None
+
+def _init_worker(specs: list[str], max_moves: int) -> None:
+    global _specs, _max_moves
+    seed_worker()
+    _specs = specs
+    _players.clear()
+    _max_moves = max_moves
+
+def _player(index: int):
+    # 每个工作进程为每种配置只创建一次玩家，play_game在开局时重置搜索树
+    if index not in _players:
+        _players[index] = make_player(_specs[index])
+    return _players[index]
+
+def _play(match: tuple[int, int, int]) -> dict:
+    """
+    在工作进程中进行一局比赛。
+
+    Args:
+        match (tuple[int, int, int]): 配置i（玩家1）、配置j（玩家2）与先手玩家编号。
+
+    Returns:
+        dict: 双方配置、先手、获胜者（和棋为0）、步数、是否因达到步数上限而判和，以及双方思考总时间与步数。
+
+    """
+    i, j, start_player = match
+    times = []
+    winner, moves = play_game(_player(i), _player(j), start_player, _max_moves, times)
+    think = {1: 0.0, 2: 0.0}
+    n_moves = {1: 0, 2: 0}
+    for player, seconds in times:
+        think[player] += seconds
+        n_moves[player] += 1
+    return {
+        'i': i, 'j': j, 'start': start_player, 'winner': winner, 'length': len(moves),
+        'capped': winner == 0 and len(moves) >= _max_moves,
+        'time_i': think[1], 'moves_i': n_moves[1], 'time_j': think[2], 'moves_j': n_moves[2],
+    }
+
+def schedule(n_configs: int, games_per_pair: int) -> list[tuple[int, int, int]]:
+    """
+    生成循环赛的全部对局：每对配置对弈games_per_pair局，先手交替。
+
+    Args:
+        n_configs (int): 配置数。
+        games_per_pair (int): 每对配置的对局数。
+
+    Returns:
+        list[tuple[int, int, int]]: (配置i, 配置j, 先手玩家编号)列表，配置i始终为玩家1。
+
+    """
+    return [(i, j, 1 + g % 2) for i, j in itertools.combinations(range(n_configs), 2) for g in range(games_per_pair)]
+
+def fit_elo(n_configs: int, results: list[dict], anchor: int = 0, prior_draws: float = 1.0,
+            iterations: int = 100) -> tuple[np.ndarray, np.ndarray]:
+    """
+    以Bradley-Terry模型的最大似然估计Elo等级分（和棋记半分），用牛顿法求解，
+    并由对数似然的海森矩阵得到各配置相对anchor的标准误差。
+    每对配置额外计入prior_draws局虚拟和棋，使全胜或全负的配置也有有限的估计。
+
+    Args:
+        n_configs (int): 配置数。
+        results (list[dict]): _play返回的对局结果。
+        anchor (int, optional): 等级分固定为0的参照配置。默认为0。
+        prior_draws (float, optional): 每对配置的虚拟和棋局数。默认为1.0。
+        iterations (int, optional): 牛顿法最大迭代次数。默认为100。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 各配置的Elo与标准误差（anchor的标准误差为0）。
+
+    """
+    games = np.zeros((n_configs, n_configs))
+    points = np.zeros((n_configs, n_configs))
+    for r in results:
+        i, j = r['i'], r['j']
+        score = 1.0 if r['winner'] == 1 else 0.0 if r['winner'] == 2 else 0.5
+        games[i, j] += 1
+        games[j, i] += 1
+        points[i, j] += score
+        points[j, i] += 1.0 - score
+    played = games > 0
+    games += prior_draws * played
+    points += prior_draws / 2 * played
+    free = [k for k in range(n_configs) if k != anchor]
+    rating = np.zeros(n_configs)
+
+    def derivatives() -> tuple[np.ndarray, np.ndarray]:
+        # 以自然对数为底的评分下对数似然的梯度与海森矩阵
+        expected = 1.0 / (1.0 + np.exp(-(rating[:, None] - rating[None, :])))
+        weight = games * expected * (1.0 - expected)
+        return np.sum(points - games * expected, axis=1), weight - np.diag(weight.sum(axis=1))
+
+    for _ in range(iterations):
+        grad, hessian = derivatives()
+        step = np.linalg.lstsq(hessian[np.ix_(free, free)], -grad[free], rcond=None)[0]
+        # 限制单步幅度，避免远离最优点时牛顿法发散
+        rating[free] += np.clip(step, -2.0, 2.0)
+        if np.max(np.abs(step)) < 1e-9:
+            break
+    _, hessian = derivatives()
+    stderr = np.zeros(n_configs)
+    covariance = np.linalg.pinv(-hessian[np.ix_(free, free)])
+    stderr[free] = np.sqrt(np.maximum(np.diag(covariance), 0.0))
+    return rating / ELO_SCALE, stderr / ELO_SCALE
+
+def summarize(specs: list[str], results: list[dict], anchor: int = 0, prior_draws: float = 1.0, z: float = 1.96) -> list[dict]:
+    """
+    汇总循环赛结果：每种配置的Elo及置信区间、得分率与平均每步思考时间。
+
+    Args:
+        specs (list[str]): 配置描述，见selfplay.make_player。
+        results (list[dict]): _play返回的对局结果。
+        anchor (int, optional): 等级分固定为0的参照配置。默认为0。
+        prior_draws (float, optional): 每对配置的虚拟和棋局数，见fit_elo。默认为1.0。
+        z (float, optional): 置信区间的正态分位数，1.96对应95%。默认为1.96。
+
+    Returns:
+        list[dict]: 每种配置一项，含spec、elo、ci、lower、upper、games、wins、draws、losses、score与ms_per_move。
+
+    """
+    n = len(specs)
+    elo, stderr = fit_elo(n, results, anchor, prior_draws)
+    rows = [{'spec': spec, 'games': 0, 'wins': 0, 'draws': 0, 'losses': 0, 'time': 0.0, 'moves': 0} for spec in specs]
+    for r in results:
+        for side, k in ((1, r['i']), (2, r['j'])):
+            row = rows[k]
+            row['games'] += 1
+            if r['winner'] == 0:
+                row['draws'] += 1
+            elif r['winner'] == side:
+                row['wins'] += 1
+            else:
+                row['losses'] += 1
+        rows[r['i']]['time'] += r['time_i']
+        rows[r['i']]['moves'] += r['moves_i']
+        rows[r['j']]['time'] += r['time_j']
+        rows[r['j']]['moves'] += r['moves_j']
+    for k, row in enumerate(rows):
+        row['elo'] = float(elo[k])
+        row['ci'] = float(z * stderr[k])
+        row['lower'] = row['elo'] - row['ci']
+        row['upper'] = row['elo'] + row['ci']
+        row['score'] = (row['wins'] + 0.5 * row['draws']) / row['games'] if row['games'] else 0.0
+        row['ms_per_move'] = 1000 * row.pop('time') / max(row.pop('moves'), 1)
+    return rows
+
+def cheapest(rows: list[dict], target: float) -> dict | None:
+    """
+    选出置信下限达到目标等级分的配置中平均每步思考时间最短的一个。
+
+    Args:
+        rows (list[dict]): summarize的结果。
+        target (float): 目标Elo（相对参照配置）。
+
+    Returns:
+        dict | None: 满足条件的配置，没有时为None。
+
+    """
+    candidates = [row for row in rows if row['lower'] >= target]
+    return min(candidates, key=lambda row: row['ms_per_move']) if candidates else None
+
+def run(specs: list[str], games_per_pair: int = 20, n_workers: int | None = None, max_moves: int = 100,
+        anchor: int = 0, chunksize: int = 1) -> tuple[list[dict], list[dict]]:
+    """
+    用进程池进行循环赛。每对配置对弈games_per_pair局并交替先手，超过max_moves步的循环对局按和棋处理。
+
+    Args:
+        specs (list[str]): 配置描述，见selfplay.make_player，例如 mcts:uniform:400:1.0。
+        games_per_pair (int, optional): 每对配置的对局数，取偶数时双方先手局数相同。默认为20。
+        n_workers (int | None, optional): 进程数，默认为CPU核数。
+        max_moves (int, optional): 每局最大步数。默认为100。
+        anchor (int, optional): 等级分固定为0的参照配置。默认为0。
+        chunksize (int, optional): 每次分发给工作进程的对局数。默认为1。
+
+    Returns:
+        tuple[list[dict], list[dict]]: summarize的汇总结果，以及每局的原始结果。
+
+    """
+    matches = schedule(len(specs), games_per_pair)
+    # 打乱顺序，使慢配置的对局均匀分散到各工作进程
+    random.shuffle(matches)
+    with Pool(n_workers, initializer=_init_worker, initargs=(specs, max_moves)) as pool:
+        results = list(pool.imap_unordered(_play, matches, chunksize))
+    return summarize(specs, results, anchor), results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MCTS配置循环赛：Elo等级分与每步思考时间')
+    parser.add_argument('specs', nargs='+', help='配置描述，例如 mcts:uniform:400:1.0、mcts:checkpoints/latest.npz:50、random')
+    parser.add_argument('-g', '--games', type=int, default=20, help='每对配置的对局数')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='进程数，默认为CPU核数')
+    parser.add_argument('--max-moves', type=int, default=100, help='每局最大步数，超过按和棋处理')
+    parser.add_argument('--anchor', type=int, default=0, help='Elo固定为0的参照配置序号')
+    parser.add_argument('--target', type=float, default=None, help='目标Elo，给出置信下限达到该值的最省时配置')
+    parser.add_argument('-o', '--out', default=None, help='将汇总与每局结果写入JSON文件')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    rows, results = run(args.specs, args.games, args.workers, args.max_moves, args.anchor)
+    elapsed = time.perf_counter() - start
+    n_capped = sum(r['capped'] for r in results)
+    print(f'{len(results)}局，耗时{elapsed:.1f}秒，达到步数上限判和：{n_capped}局')
+    print(f'{"配置":<36}{"Elo":>8}{"95%区间":>16}{"得分率":>8}{"胜/和/负":>14}{"毫秒/步":>10}')
+    for row in sorted(rows, key=lambda row: -row['elo']):
+        interval = f'±{row["ci"]:.0f}'
+        record = f'{row["wins"]}/{row["draws"]}/{row["losses"]}'
+        print(f'{row["spec"]:<36}{row["elo"]:>8.0f}{interval:>16}{row["score"]:>8.1%}{record:>14}{row["ms_per_move"]:>10.2f}')
+    if args.target is not None:
+        best = cheapest(rows, args.target)
+        if best is None:
+            print(f'没有配置的置信下限达到 {args.target:.0f}')
+        else:
+            print(f'达到 {args.target:.0f} 的最省时配置：{best["spec"]}（{best["ms_per_move"]:.2f} 毫秒/步）')
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'specs': args.specs, 'summary': rows, 'results': results}, f, ensure_ascii=False, indent=2)
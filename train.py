@@ -0,0 +1,199 @@
+import argparse
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from bitgame import BitGame
+from features import encode_state
+from mcts import MCTS
+from network import N_ACTIONS, PolicyValueNet
+from parallel import seed_worker
+from replay import ReplayBuffer
+
+def self_play_game(net: PolicyValueNet, n_playout: int = 200, c_puct: float = 1.0, temperature_moves: int = 4,
+                   max_moves: int = 60, batch_size: int = 8) -> tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    用网络引导的MCTS自对弈一局，双方共用一棵搜索树。前temperature_moves步按根节点访问次数成比例随机落子，
+    之后选择访问次数最多的落子。超过max_moves步按和棋处理。
+
+    Args:
+        net (PolicyValueNet): 策略价值网络。
+        n_playout (int, optional): 每步的模拟次数。默认为200。
+        c_puct (float, optional): UCT公式中的探索系数。默认为1.0。
+        temperature_moves (int, optional): 按访问分布随机落子的步数。默认为4。
+        max_moves (int, optional): 每局最大步数。默认为60。
+        batch_size (int, optional): 批量搜索时每批评估的叶节点数。默认为8。
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, int]: 每步的编码局面、访问分布、行棋方视角的对局结果，以及获胜者编号（和棋为0）。
+
+    """
+    game = BitGame()
+    game.init_board(random.choice((1, 2)))
+    mcts = MCTS(net.policy_value, c_puct, n_playout, undo=True, policy_value_batch_fn=net.policy_value_batch, batch_size=batch_size)
+    states, pis, players = [], [], []
+    winner = 0
+    for n_moves in range(max_moves):
+        mcts.search(game)
+        visits = mcts.root_child_visits(game)
+        pi = np.zeros(N_ACTIONS, dtype=np.float32)
+        for move, n in visits.items():
+            pi[move] = n
+        pi /= pi.sum()
+        states.append(encode_state(game))
+        pis.append(pi)
+        players.append(game.current_player)
+        if n_moves < temperature_moves:
+            move = int(np.random.choice(N_ACTIONS, p=pi))
+        else:
+            move = int(np.argmax(pi))
+        game.do_move(move)
+        mcts.update_with_move(move)
+        done, win = game.game_end()
+        if done:
+            winner = win or 0
+            break
+    zs = np.array([0.0 if winner == 0 else (1.0 if player == winner else -1.0) for player in players], dtype=np.float32)
+    return np.array(states), np.array(pis), zs, winner
+
+def play_and_store(net: PolicyValueNet, buffer: ReplayBuffer, n_playout: int = 200, c_puct: float = 1.0,
+                   temperature_moves: int = 4, max_moves: int = 60) -> tuple[int, int]:
+    """
+    自对弈一局并把样本写入经验池，参数见self_play_game。
+
+    Args:
+        net (PolicyValueNet): 策略价值网络。
+        buffer (ReplayBuffer): 经验池。
+        n_playout (int, optional): 每步的模拟次数。默认为200。
+        c_puct (float, optional): UCT公式中的探索系数。默认为1.0。
+        temperature_moves (int, optional): 按访问分布随机落子的步数。默认为4。
+        max_moves (int, optional): 每局最大步数。默认为60。
+
+    Returns:
+        tuple[int, int]: 写入的样本数与获胜者编号（和棋为0）。
+
+    """
+    states, pis, zs, winner = self_play_game(net, n_playout, c_puct, temperature_moves, max_moves)
+    buffer.append(states, pis, zs)
+    return len(zs), winner
+
+_net = None
+_net_path = None
+_buffer = None
+
+def _self_play(args: tuple) -> tuple[int, int]:
+    # 工作进程按检查点路径缓存网络，同一轮的对局只加载一次；样本直接写入共享的经验池，只回传统计
+    global _net, _net_path, _buffer
+    path, version, buffer_path, n_playout, c_puct, temperature_moves, max_moves = args
+    if _net_path != (path, version):
+        _net = PolicyValueNet.load(path)
+        _net_path = (path, version)
+    if _buffer is None or _buffer.path != buffer_path:
+        _buffer = ReplayBuffer(buffer_path)
+    return play_and_store(_net, _buffer, n_playout, c_puct, temperature_moves, max_moves)
+
+def train(out_dir: str = 'checkpoints', n_iterations: int = 50, games_per_iteration: int = 20, n_playout: int = 200,
+          c_puct: float = 1.0, temperature_moves: int = 4, max_moves: int = 60, buffer_size: int = 50000,
+          batch_size: int = 256, train_steps: int = 100, lr: float = 1e-3, weight_decay: float = 1e-4,
+          hidden: tuple[int, ...] = (128, 128), resume: str | None = None, n_workers: int = 1, seed: int | None = None,
+          augment: bool = True, alpha: float = 0.0, beta: float = 0.4) -> PolicyValueNet:
+    """
+    自对弈 → 经验池 → 训练的循环。每轮先用当前网络自对弈若干局，样本写入经验池，
+    再从经验池随机抽取小批量训练若干步，并保存检查点 out_dir/net_XXXX.npz 与 out_dir/latest.npz。
+    经验池为内存映射的 out_dir/replay（见replay.ReplayBuffer），自对弈进程直接写入，重启后保留已有样本。
+
+    Args:
+        out_dir (str, optional): 检查点目录。默认为'checkpoints'。
+        n_iterations (int, optional): 轮数。默认为50。
+        games_per_iteration (int, optional): 每轮自对弈局数。默认为20。
+        n_playout (int, optional): 自对弈时每步的模拟次数。默认为200。
+        c_puct (float, optional): UCT公式中的探索系数。默认为1.0。
+        temperature_moves (int, optional): 每局开始按访问分布随机落子的步数。默认为4。
+        max_moves (int, optional): 每局最大步数。默认为60。
+        buffer_size (int, optional): 经验池容量。默认为50000。
+        batch_size (int, optional): 训练小批量大小。默认为256。
+        train_steps (int, optional): 每轮训练步数。默认为100。
+        lr (float, optional): 学习率。默认为1e-3。
+        weight_decay (float, optional): L2正则系数。默认为1e-4。
+        hidden (tuple[int, ...], optional): 新建网络时各隐藏层的宽度。默认为(128, 128)。
+        resume (str | None, optional): 从该检查点继续训练。默认为None。
+        n_workers (int, optional): 自对弈进程数，为1时在本进程中进行。默认为1。
+        seed (int | None, optional): 随机种子。默认为None。
+        augment (bool, optional): 训练时是否对样本随机施加8种棋盘对称变换。默认为True。
+        alpha (float, optional): 优先经验回放的优先级指数，0为均匀抽样。默认为0.0。
+        beta (float, optional): 优先经验回放的重要性权重指数。默认为0.4。
+
+    Returns:
+        PolicyValueNet: 训练后的网络。
+
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    net = PolicyValueNet.load(resume) if resume else PolicyValueNet(hidden, seed=seed)
+    buffer_path = os.path.join(out_dir, 'replay')
+    buffer = ReplayBuffer(buffer_path, None if os.path.exists(buffer_path) else buffer_size)
+    latest = os.path.join(out_dir, 'latest.npz')
+    pool = Pool(n_workers, initializer=seed_worker) if n_workers > 1 else None
+    try:
+        for iteration in range(1, n_iterations + 1):
+            start = time.perf_counter()
+            results = {1: 0, 2: 0, 0: 0}
+            n_samples = 0
+            if pool is not None:
+                net.save(latest)
+                job = (latest, iteration, buffer_path, n_playout, c_puct, temperature_moves, max_moves)
+                games = pool.imap_unordered(_self_play, [job] * games_per_iteration)
+            else:
+                games = (play_and_store(net, buffer, n_playout, c_puct, temperature_moves, max_moves) for _ in range(games_per_iteration))
+            for n, winner in games:
+                results[winner] += 1
+                n_samples += n
+            play_time = time.perf_counter() - start
+            stats = {}
+            if len(buffer) >= batch_size:
+                for _ in range(train_steps):
+                    batch = buffer.sample(batch_size, rng, augment, alpha, beta)
+                    x, pis, zs = batch['states'], batch['pis'], batch['zs']
+                    stats = net.train_step(x, pis, zs, lr=lr, weight_decay=weight_decay, weights=batch['weights'] if alpha else None)
+                    if alpha:
+                        buffer.update_priorities(batch['index'], net.sample_losses(x, pis, zs), total=batch['total'])
+            net.save(os.path.join(out_dir, f'net_{iteration:04d}.npz'))
+            net.save(latest)
+            message = (f'第{iteration}轮 样本：{n_samples}（经验池{len(buffer)}） '
+                       f'玩家1胜/玩家2胜/和：{results[1]}/{results[2]}/{results[0]} 自对弈{play_time:.1f}秒')
+            if stats:
+                message += f' 损失：{stats["loss"]:.3f}（价值{stats["value_loss"]:.3f} 策略{stats["policy_loss"]:.3f}）'
+            print(message, flush=True)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return net
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='策略价值网络自对弈训练')
+    parser.add_argument('-o', '--out', default='checkpoints', help='检查点目录')
+    parser.add_argument('-i', '--iterations', type=int, default=50, help='轮数')
+    parser.add_argument('-g', '--games', type=int, default=20, help='每轮自对弈局数')
+    parser.add_argument('-n', '--playouts', type=int, default=200, help='自对弈每步模拟次数')
+    parser.add_argument('-s', '--steps', type=int, default=100, help='每轮训练步数')
+    parser.add_argument('-b', '--batch-size', type=int, default=256, help='训练小批量大小')
+    parser.add_argument('--lr', type=float, default=1e-3, help='学习率')
+    parser.add_argument('--hidden', type=int, nargs='+', default=[128, 128], help='各隐藏层宽度')
+    parser.add_argument('--resume', default=None, help='从该检查点继续训练')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='自对弈进程数')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子')
+    parser.add_argument('--buffer-size', type=int, default=50000, help='新建经验池的容量')
+    parser.add_argument('--no-augment', action='store_true', help='训练时不做对称变换增广')
+    parser.add_argument('--alpha', type=float, default=0.0, help='优先经验回放的优先级指数，0为均匀抽样')
+    args = parser.parse_args()
+    train(args.out, args.iterations, args.games, args.playouts, buffer_size=args.buffer_size, batch_size=args.batch_size,
+          train_steps=args.steps, lr=args.lr, hidden=tuple(args.hidden), resume=args.resume, n_workers=args.workers,
+          seed=args.seed, augment=not args.no_augment, alpha=args.alpha)
@@ -0,0 +1,339 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from bitgame import BitGame
+from mcts import MCTS, SearchProfile, SearchStats, terminal_value
+from symmetry import INVERSE, canonicalize, to_canonical_priors
+
+def _from_canonical(action:int, t:int) -> int:
+    # 未开启symmetry时t恒为0，动作无需变换，也不限于3x3棋盘
+    return INVERSE[t][action] if t else action
+
+class TTNode:
+    __slots__ = ('n_visits', 'actions', 'priors', 'edge_n', 'edge_w')
+
+    def __init__(self, action_priors:list[tuple[int, float]]) -> None:
+        """
+        置换表中的局面节点，所有到达同一局面的路径共享该节点及其出边统计。
+
+        Args:
+            action_priors (list[tuple[int, float]]): 包含动作和对应先验概率的元组列表。
+
+        Returns:
+            None
+
+        """
+        self.n_visits = 0
+        self.actions = [action for action, _ in action_priors]
+        self.priors = [prob for _, prob in action_priors]
+        self.edge_n = [0] * len(self.actions)
+        self.edge_w = [0.0] * len(self.actions)
+
+    def select(self, c_puct:float) -> int:
+        """
+        按PUCT公式选择一条出边。
+
+        Args:
+            c_puct (float): UCB公式中的参数，用于平衡探索和利用。
+
+        Returns:
+            int: 出边在actions中的下标。
+
+        """
+        sqrt_n = math.sqrt(self.n_visits)
+        best, best_score = 0, -float('inf')
+        for i in range(len(self.actions)):
+            n = self.edge_n[i]
+            q = self.edge_w[i] / n if n else 0.0
+            score = q + c_puct * self.priors[i] * sqrt_n / (1 + n)
+            if score > best_score:
+                best, best_score = i, score
+        return best
+
+
+class TranspositionTable:
+    def __init__(self, capacity:int=200000) -> None:
+        """
+        以局面Zobrist键索引的有界置换表，超出容量时淘汰最久未使用的节点。
+
+        Args:
+            capacity (int, optional): 最多保存的节点数。默认为200000。
+
+        Returns:
+            None
+
+        """
+        self.capacity = capacity
+        self.nodes = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, key:int) -> TTNode|None:
+        """
+        查找局面节点并将其标记为最近使用。
+
+        Args:
+            key (int): 局面Zobrist键。
+
+        Returns:
+            TTNode|None: 找到的节点，不存在时返回None。
+
+        """
+        node = self.nodes.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.nodes.move_to_end(key)
+        return node
+
+    def put(self, key:int, node:TTNode) -> None:
+        """
+        插入局面节点，必要时淘汰最久未使用的节点。
+
+        Args:
+            key (int): 局面Zobrist键。
+            node (TTNode): 局面节点。
+
+        Returns:
+            None
+
+        """
+        self.nodes[key] = node
+        if len(self.nodes) > self.capacity:
+            self.nodes.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.nodes.clear()
+
+
+class TTMCTS(MCTS):
+    def __init__(self, policy_value_fn:Callable[[BitGame], tuple[list[tuple[int, float]], float]], c_puct:float=1.0, n_playout:int=2000, undo:bool=False, capacity:int=200000,
+                 time_limit:float|None=None, max_nodes:int|None=None, early_stop:bool=False, symmetry:bool=False,
+                 profile:bool=False, hook:Callable[[SearchStats], None]|None=None) -> None:
+        """
+        基于置换表的蒙特卡洛树搜索，搜索树变为以局面键合并的有向图，接口与MCTS一致。
+        局面需提供随落子更新的zobrist属性（见bitgame.BitGame与game.Game）。
+        开启symmetry时以对称规范局面为键，节点的出边保存在规范局面的坐标系下，仅支持3x3棋盘。
+
+        Args:
+            policy_value_fn (Callable[[BitGame], tuple[list[tuple[int, float]], float]]): 策略价值函数，输入当前状态，输出每个动作的概率分布和当前状态的价值。
+            c_puct (float, optional):UCT公式中的探索系数，用于平衡探索和利用。默认为1.0。
+            n_playout (int, optional):每次模拟游戏进行的次数。默认为2000。
+            undo (bool, optional):为True时所有模拟在同一个游戏对象上落子并通过undo_move撤销。默认为False。
+            capacity (int, optional):置换表容量。默认为200000。
+            time_limit (float|None, optional):每步搜索的时间上限（秒）。默认为None。
+            max_nodes (int|None, optional):置换表节点数上限。默认为None。
+            early_stop (bool, optional):最佳根动作已无法被超越时提前停止。默认为False。
+            symmetry (bool, optional):是否按8种棋盘对称合并局面。默认为False。
+            profile (bool, optional):是否记录分阶段耗时与计数，见MCTS。默认为False。
+            hook (Callable[[SearchStats], None]|None, optional):每次get_move结束后调用的回调，见MCTS。默认为None。
+
+        Returns:
+            None
+        """
+        super().__init__(policy_value_fn, c_puct, n_playout, undo, time_limit=time_limit, max_nodes=max_nodes, early_stop=early_stop,
+                         profile=profile, hook=hook)
+        self.table = TranspositionTable(capacity)
+        self.symmetry = symmetry
+        self.root = None
+
+    def _key(self, state:BitGame) -> tuple[int, int]:
+        """
+        计算置换表键。
+
+        Args:
+            state (BitGame): 游戏状态。
+
+        Returns:
+            tuple[int, int]: 置换表键，以及从实际局面到节点坐标系的对称变换编号（未开启symmetry时为0）。
+
+        """
+        if self.symmetry:
+            return canonicalize(state)
+        return state.zobrist, 0
+
+    def _node(self, state:BitGame, profile:SearchProfile|None=None) -> tuple[TTNode, float|None, int]:
+        """
+        获取局面节点，不存在时调用策略价值函数创建。
+
+        Args:
+            state (BitGame): 游戏状态。
+            profile (SearchProfile|None, optional): 给定时记录置换表命中、策略价值函数调用与新建节点的耗时。默认为None。
+
+        Returns:
+            tuple[TTNode, float|None, int]: 局面节点，新建节点时的叶节点价值（已存在时为None），以及对称变换编号。
+
+        """
+        key, t = self._key(state)
+        node = self.table.get(key)
+        if node is not None:
+            if profile is not None:
+                profile.tt_hits += 1
+            return node, None, t
+        if profile is not None:
+            t0 = time.perf_counter()
+        action_probs, leaf_value = self.policy(state)
+        if profile is not None:
+            t1 = time.perf_counter()
+        if t:
+            action_probs = to_canonical_priors(action_probs, t)
+        node = TTNode(action_probs)
+        self.table.put(key, node)
+        if profile is not None:
+            profile.policy_time += t1 - t0
+            profile.expand_time += time.perf_counter() - t1
+            profile.policy_calls += 1
+            profile.nodes_expanded += 1
+            profile.children_created += len(node.actions)
+        return node, leaf_value, t
+
+    def _descend(self, state:BitGame, profile:SearchProfile|None=None) -> tuple[list[tuple[TTNode, int]], float]:
+        """
+        自当前局面向下选择，直到新建局面节点、对局结束或局面在路径上重复出现（视为循环，按和棋估值）。
+
+        Args:
+            state (BitGame): 当前游戏状态，沿途的落子在其上执行。
+            profile (SearchProfile|None, optional): 累加统计的对象，见_node。默认为None。
+
+        Returns:
+            tuple[list[tuple[TTNode, int]], float]: 经过的(节点, 出边下标)列表，以及叶局面行棋方视角的价值。
+
+        """
+        node, leaf_value, t = self._node(state, profile)
+        if leaf_value is not None:
+            node.n_visits += 1
+        path = []
+        seen = {state.zobrist}
+        while leaf_value is None:
+            i = node.select(self.c_puct)
+            state.do_move(_from_canonical(node.actions[i], t))
+            path.append((node, i))
+            end, winner = state.game_end()
+            if end:
+                if profile is not None:
+                    profile.terminal_leaves += 1
+                leaf_value = terminal_value(state, winner)
+                break
+            if state.zobrist in seen:
+                leaf_value = 0.0
+                break
+            seen.add(state.zobrist)
+            node, leaf_value, t = self._node(state, profile)
+            if leaf_value is not None:
+                node.n_visits += 1
+        return path, leaf_value
+
+    def _backup_path(self, path:list[tuple[TTNode, int]], leaf_value:float) -> None:
+        # leaf_value为叶局面行棋方视角的价值，逐层取反后累加到出边
+        value = leaf_value
+        for node, i in reversed(path):
+            value = -value
+            node.n_visits += 1
+            node.edge_n[i] += 1
+            node.edge_w[i] += value
+
+    def playout(self, state:BitGame) -> int:
+        """
+        进行一次模拟。路径上重复出现的局面视为循环，按和棋估值，不再向下展开。
+
+        Args:
+            state (BitGame): 当前游戏状态
+
+        Returns:
+            int: 本次模拟在state上执行的落子数，可用于undo_move撤销。
+
+        """
+        path, leaf_value = self._descend(state)
+        self._backup_path(path, leaf_value)
+        return len(path)
+
+    def playout_profiled(self, state:BitGame, profile:SearchProfile) -> int:
+        """
+        与playout相同的一次模拟，额外把各阶段耗时与计数累加到profile。
+        选择阶段的耗时为下行总耗时减去其中调用策略价值函数与新建节点的耗时。
+
+        Args:
+            state (BitGame): 当前游戏状态
+            profile (SearchProfile): 累加统计的对象。
+
+        Returns:
+            int: 本次模拟在state上执行的落子数，可用于undo_move撤销。
+
+        """
+        t0 = time.perf_counter()
+        nested = profile.policy_time + profile.expand_time
+        path, leaf_value = self._descend(state, profile)
+        t1 = time.perf_counter()
+        self._backup_path(path, leaf_value)
+        profile.select_time += t1 - t0 - (profile.policy_time + profile.expand_time - nested)
+        profile.backup_time += time.perf_counter() - t1
+        profile.add_playout(len(path))
+        return len(path)
+
+    def root_visits(self, state:BitGame) -> int:
+        """
+        获取当前局面节点的访问次数，包括经由其他路径到达该局面时累积的访问。
+
+        Args:
+            state (BitGame): 游戏当前状态。
+
+        Returns:
+            int: 局面节点访问次数，不在置换表中时为0。
+
+        """
+        node = self.table.nodes.get(self._key(state)[0])
+        return node.n_visits if node is not None else 0
+
+    def root_child_visits(self, state:BitGame) -> dict[int, float]:
+        """
+        获取当前局面各出边的访问次数。
+
+        Args:
+            state (BitGame): 游戏当前状态。
+
+        Returns:
+            dict[int, float]: 动作到访问次数的映射。
+
+        """
+        key, t = self._key(state)
+        node = self.table.nodes.get(key)
+        if node is None:
+            return {}
+        return {_from_canonical(action, t): n for action, n in zip(node.actions, node.edge_n)}
+
+    def tree_size(self) -> int:
+        return len(self.table)
+
+    def update_with_move(self, last_move:int) -> None:
+        """
+        置换表按局面索引，走子后无需调整，已有统计会在后续搜索中自动复用。
+
+        Args:
+            last_move (int): 上一步的移动id
+
+        Returns:
+            None
+
+        """
+        pass
+
+    def reset(self) -> None:
+        """
+        清空置换表。
+
+        Args:
+            无参数。
+
+        Returns:
+            None
+
+        """
+        self.table.clear()